@@ -0,0 +1,84 @@
+"""Compares page loads of each site with and without its blocking profile.
+
+Run with ``python -m benchmarks.bench_blocking [--site NAME] [--repeat N]``. Every load uses a fresh
+browser context, so nothing is served from the cache, and the table shows requests, bytes and load
+time without blocking, with the profile, and what the profile saved.
+"""
+import argparse
+import os
+import time
+
+from blocking import BlockStats, get_profile, response_listener, route_handler
+from lyrics_http import LYRICS_URL
+
+# Each site with the blocking profile its task uses
+SITES = {
+    'orders': (os.environ.get("ORDER_URL", "https://robotsparebinindustries.com/#/robot-order"), 'orders'),
+    'rpachallenge': (os.environ.get("FORM_URL", "https://www.rpachallenge.com/"), 'rpachallenge'),
+    'lyrics': (LYRICS_URL, 'lyrics'),
+}
+
+
+def load_page(browser, url, profile=None):
+    """Loads ``url`` in a fresh context and returns its BlockStats."""
+    stats = BlockStats(profile and profile.name)
+    context = browser.new_context()
+    try:
+        if profile:
+            context.route("**/*", route_handler(profile, stats))
+        context.on("response", response_listener(stats))
+        page = context.new_page()
+        start = time.perf_counter()
+        page.goto(url, wait_until="load")
+        stats.record_page_load(time.perf_counter() - start)
+    finally:
+        context.close()
+    return stats
+
+
+def bench_site(browser, url, profile, repeat=3):
+    """Returns the average requests, bytes and seconds of ``repeat`` loads without and with the profile."""
+    results = {}
+    for label, active in (('off', None), ('on', profile)):
+        runs = [load_page(browser, url, active) for _ in range(repeat)]
+        results[label] = {
+            'requests': sum(stats.loaded for stats in runs) / repeat,
+            'blocked': sum(stats.blocked for stats in runs) / repeat,
+            'bytes': sum(stats.bytes_loaded for stats in runs) / repeat,
+            'seconds': sum(stats.load_seconds[0] for stats in runs) / repeat,
+        }
+    return results
+
+
+def main():
+    from playwright.sync_api import sync_playwright
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--site', action='append', choices=sorted(SITES), help="only load these sites")
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'Site':<13} {'Profile':<7} {'Requests':>9} {'Blocked':>8} {'KiB':>8} {'Load s':>7}")
+    with sync_playwright() as playwright:
+        browser = playwright.chromium.launch(headless=True)
+        try:
+            for name in args.site or SITES:
+                url, profile_name = SITES[name]
+                profile = get_profile(profile_name)
+                if not profile:
+                    print(f"{name:<13} skipped, BLOCK_PROFILE is none")
+                    continue
+                results = bench_site(browser, url, profile, args.repeat)
+                for label in ('off', 'on'):
+                    result = results[label]
+                    print(f"{name:<13} {label:<7} {result['requests']:>9.0f} {result['blocked']:>8.0f} "
+                          f"{result['bytes'] / 1024:>8.0f} {result['seconds']:>7.2f}")
+                off, on = results['off'], results['on']
+                print(f"{name:<13} {'saved':<7} {off['requests'] - on['requests']:>9.0f} {'':>8} "
+                      f"{(off['bytes'] - on['bytes']) / 1024:>8.0f} {off['seconds'] - on['seconds']:>7.2f}")
+        finally:
+            browser.close()
+
+
+if __name__ == '__main__':
+    main()
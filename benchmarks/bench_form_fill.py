@@ -0,0 +1,61 @@
+"""Compares rows/sec of the per-field and turbo form fill modes against a local copy of the challenge page.
+
+Run with ``python -m benchmarks.bench_form_fill [--rows N] [--slowmo MS]``.
+"""
+import argparse
+import itertools
+import pathlib
+import time
+
+from playwright.sync_api import sync_playwright
+
+from input_form import FORM_FIELDS, FORM_RESET_CONDITION, fill_fields
+from row_readers import iter_xlsx_rows
+
+FIXTURE = pathlib.Path(__file__).parent / 'fixtures' / 'rpachallenge.html'
+MODES = ('fields', 'turbo')
+
+
+def run_mode(page, mode, rows, url):
+    """Fills every row in the given mode and returns the elapsed seconds."""
+    page.goto(f"{url}?rounds={len(rows)}")
+    start = time.perf_counter()
+    for row in rows:
+        fill_fields(page, row, mode)
+        page.click(".btn.uiColorButton")
+        page.wait_for_function(FORM_RESET_CONDITION, timeout=10000)
+    elapsed = time.perf_counter() - start
+
+    # Make sure the page actually received the values, not just that the inputs changed
+    received = page.evaluate("() => window.receivedRows()")
+    expected = {name: str(rows[0].get(key, '')) for name, key in FORM_FIELDS.items()}
+    if len(received) != len(rows) or received[0] != expected:
+        raise AssertionError(f"{mode} mode did not submit the expected values")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=100, help="number of rows to submit per mode")
+    parser.add_argument('--slowmo', type=int, default=0, help="Playwright slow-motion delay in milliseconds")
+    parser.add_argument('--input', default='challenge.xlsx', help="Excel file the rows are taken from")
+    args = parser.parse_args()
+
+    source = list(iter_xlsx_rows(args.input, 'data'))
+    rows = list(itertools.islice(itertools.cycle(source), args.rows))
+    url = FIXTURE.resolve().as_uri()
+
+    print(f"{'Mode':<8} {'Rows':>6} {'Seconds':>9} {'Rows/sec':>9}")
+    with sync_playwright() as playwright:
+        browser = playwright.chromium.launch(headless=True, slow_mo=args.slowmo)
+        try:
+            page = browser.new_page()
+            for mode in MODES:
+                elapsed = run_mode(page, mode, rows, url)
+                print(f"{mode:<8} {len(rows):>6} {elapsed:>9.2f} {len(rows) / elapsed:>9.1f}")
+        finally:
+            browser.close()
+
+
+if __name__ == '__main__':
+    main()
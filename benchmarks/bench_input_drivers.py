@@ -0,0 +1,58 @@
+"""Measures the time per field of each GetLyrics input driver against a local page.
+
+Run with ``python -m benchmarks.bench_input_drivers [--fields N] [--include-os]``. The OS-level
+driver needs a visible browser window with focus, so it is only measured with --include-os.
+"""
+import argparse
+import pathlib
+import time
+
+from selenium import webdriver
+from selenium.webdriver.common.by import By
+
+from input_drivers import INPUT_DRIVERS, OsTypingDriver
+
+FIXTURE = pathlib.Path(__file__).parent / 'fixtures' / 'input_fields.html'
+TEXT = "Never Gonna Give You Up - Rick"
+
+
+def run_driver(browser, input_driver, fields):
+    """Enters TEXT ``fields`` times and returns the mean seconds per field."""
+    browser.get(FIXTURE.resolve().as_uri())
+    element = browser.find_element(By.ID, 'search')
+    start = time.perf_counter()
+    for _ in range(fields):
+        browser.execute_script("arguments[0].value = '';", element)
+        input_driver.enter_text(browser, element, TEXT)
+    elapsed = time.perf_counter() - start
+
+    # The page must have seen the value through its input event, like the autocomplete does
+    echoed = browser.find_element(By.ID, 'echo').text
+    if echoed != TEXT:
+        raise AssertionError(f"{input_driver.name} driver left '{echoed}' instead of '{TEXT}'")
+    return elapsed / fields
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--fields', type=int, default=20, help="number of fields to fill per driver")
+    parser.add_argument('--include-os', action='store_true', help="also measure pyautogui typing")
+    args = parser.parse_args()
+
+    options = webdriver.ChromeOptions()
+    if not args.include_os:
+        options.add_argument("--headless=new")
+    browser = webdriver.Chrome(options=options)
+    try:
+        print(f"{'Driver':<10} {'Fields':>6} {'ms/field':>9}")
+        for name, driver_class in INPUT_DRIVERS.items():
+            if driver_class is OsTypingDriver and not args.include_os:
+                continue
+            seconds = run_driver(browser, driver_class(), args.fields)
+            print(f"{name:<10} {args.fields:>6} {seconds * 1000:>9.1f}")
+    finally:
+        browser.quit()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,156 @@
+"""Reports how long each task in robot.yaml spends importing its modules, and fails over budget.
+
+Run with ``python -m benchmarks.bench_startup [--budget SECONDS] [--task-budget NAME=SECONDS]``.
+Every task's modules are imported in a fresh interpreter, ``--repeat`` times, and the best time
+is reported with the slowest direct imports. The default budget comes from STARTUP_BUDGET.
+
+Only tasks over budget fail the run. Tasks whose module does not exist are skipped, and tasks
+that fail to import are reported but only fail the run with ``--strict``.
+"""
+import argparse
+import importlib.util
+import os
+import re
+import shlex
+import subprocess
+import sys
+
+import yaml
+
+ROBOT_YAML = 'robot.yaml'
+# Prints the seconds spent importing the modules given on the command line
+IMPORT_SCRIPT = """
+import importlib, sys, time
+start = time.perf_counter()
+for name in sys.argv[1:]:
+    importlib.import_module(name)
+print(time.perf_counter() - start)
+"""
+
+
+def module_for_path(path):
+    """Returns the module name of a Python file given relative to the robot root."""
+    return os.path.splitext(path)[0].replace('/', '.').replace('\\', '.')
+
+
+def robot_libraries(robot_file):
+    """Returns the modules a Robot Framework suite loads through its Library settings."""
+    modules = []
+    with open(robot_file, 'r', encoding='utf-8') as file:
+        for line in file:
+            match = re.match(r'Library\s+(\S+)', line)
+            if match:
+                library = match.group(1)
+                modules.append(module_for_path(library) if library.endswith('.py') else library)
+    return modules
+
+
+def task_modules(definition):
+    """Returns the modules a robot.yaml task imports at startup, or None when it cannot be told."""
+    command = definition.get('command') or shlex.split(definition.get('shell', ''))
+    if len(command) >= 3 and command[1] == '-m':
+        if command[2] == 'robot':
+            return [module for arg in command if arg.endswith('.robot') for module in robot_libraries(arg)]
+        if command[2] == 'robocorp.tasks' and 'run' in command:
+            return [module_for_path(command[command.index('run') + 1])]
+        return [command[2]]
+    return None
+
+
+def measure(modules, repeat=3):
+    """Returns the best import time in seconds over ``repeat`` fresh interpreters."""
+    times = []
+    for _ in range(repeat):
+        result = subprocess.run(
+            [sys.executable, '-c', IMPORT_SCRIPT, *modules],
+            capture_output=True, text=True,
+        )
+        if result.returncode != 0:
+            raise ImportError(result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "import failed")
+        times.append(float(result.stdout.strip().splitlines()[-1]))
+    return min(times)
+
+
+def slowest_imports(modules, top=3):
+    """Returns the slowest direct imports of the given modules as (name, seconds), using -X importtime."""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f"import {', '.join(modules)}"],
+        capture_output=True, text=True,
+    )
+    entries = []
+    for line in result.stderr.splitlines():
+        match = re.match(r'import time:\s+\d+ \|\s+(\d+) \|( *)(\S+)', line)
+        # Depth 1 are the modules imported directly by the task module, which sits at depth 0
+        if match and len(match.group(2)) // 2 == 1:
+            entries.append((match.group(3), int(match.group(1)) / 1e6))
+    return sorted(entries, key=lambda entry: entry[1], reverse=True)[:top]
+
+
+def missing_modules(modules):
+    """Returns the modules that cannot be found, without importing them."""
+    missing = []
+    for module in modules:
+        try:
+            found = importlib.util.find_spec(module) is not None
+        except ImportError:
+            found = False
+        if not found:
+            missing.append(module)
+    return missing
+
+
+def parse_task_budgets(values):
+    budgets = {}
+    for value in values:
+        name, _, seconds = value.partition('=')
+        budgets[name] = float(seconds)
+    return budgets
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--robot', default=ROBOT_YAML)
+    parser.add_argument('--budget', type=float, default=float(os.environ.get("STARTUP_BUDGET", "2.0")),
+                        help="maximum import seconds of any task")
+    parser.add_argument('--task-budget', action='append', default=[], metavar='NAME=SECONDS',
+                        help="budget of a single task, overriding --budget")
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--task', action='append', help="only profile these tasks")
+    parser.add_argument('--strict', action='store_true', help="also fail when a task's modules fail to import")
+    args = parser.parse_args()
+
+    with open(args.robot, 'r', encoding='utf-8') as file:
+        tasks = yaml.safe_load(file)['tasks']
+    budgets = parse_task_budgets(args.task_budget)
+
+    failures = 0
+    print(f"{'Task':<22} {'Import s':>9} {'Budget s':>9}  Status  Slowest imports")
+    for name, definition in tasks.items():
+        if args.task and name not in args.task:
+            continue
+        budget = budgets.get(name, args.budget)
+        modules = task_modules(definition)
+        if not modules:
+            print(f"{name:<22} {'-':>9} {budget:>9.2f}  skip    cannot tell which modules the task loads")
+            continue
+        missing = missing_modules(modules)
+        if missing:
+            print(f"{name:<22} {'-':>9} {budget:>9.2f}  skip    no module {', '.join(missing)}")
+            continue
+        try:
+            seconds = measure(modules, args.repeat)
+        except ImportError as e:
+            failures += args.strict
+            print(f"{name:<22} {'-':>9} {budget:>9.2f}  ERROR   {e}")
+            continue
+        status = 'ok' if seconds <= budget else 'OVER'
+        failures += status == 'OVER'
+        slowest = ", ".join(f"{module} {module_seconds:.2f}s" for module, module_seconds in slowest_imports(modules))
+        print(f"{name:<22} {seconds:>9.3f} {budget:>9.2f}  {status:<6}  {slowest}")
+
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,166 @@
+"""Measures orders/min, rows/sec and songs/min of the tasks against the local site stand-ins.
+
+Run with ``python -m benchmarks.bench_throughput [--only orders,rows,songs] [--latency S] [--error-rate R]``.
+Each run is appended to output/benchmarks.jsonl. With ``--baseline FILE`` (a line from an earlier run),
+the run fails when any rate drops more than ``--tolerance`` below the baseline.
+"""
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+from benchmarks.standins import start_standins
+from row_readers import iter_csv_rows, iter_xlsx_rows
+
+RESULTS_PATH = os.path.abspath(os.path.join('output', 'benchmarks.jsonl'))
+INPUT_FILES = ('orders.csv', 'challenge.xlsx')
+BENCHMARKS = ('orders', 'rows', 'songs')
+UNITS = {'orders': 'orders/min', 'rows': 'rows/sec', 'songs': 'songs/min'}
+
+
+def bench_orders():
+    """Runs the order_robots flow over orders.csv and returns the completed orders and seconds."""
+    # Imported only now, so ORDER_URL already points at the stand-in
+    import order_robots
+
+    rows = list(iter_csv_rows('orders.csv'))
+    attached = order_robots.open_order_browser(headless=True)
+    start = time.perf_counter()
+    try:
+        completed = order_robots.process_order_rows(rows)
+    finally:
+        order_robots.close_order_browser(attached)
+    return len(completed), time.perf_counter() - start
+
+
+def bench_rows():
+    """Runs insert_data_to_form's row loop over challenge.xlsx and returns the accepted rows and seconds."""
+    from playwright.sync_api import sync_playwright
+
+    import input_form
+
+    rounds = sum(1 for _ in iter_xlsx_rows('challenge.xlsx', 'data'))
+    os.makedirs('images', exist_ok=True)
+    with sync_playwright() as playwright:
+        browser = playwright.chromium.launch(headless=True)
+        try:
+            page = browser.new_page()
+            page.goto(f"{input_form.FORM_URL}?rounds={rounds}")
+            start = time.perf_counter()
+            input_form.fill_form_with_excel_data(page)
+            elapsed = time.perf_counter() - start
+            accepted = page.evaluate("() => window.receivedRows().length")
+        finally:
+            browser.close()
+    return accepted, elapsed
+
+
+def bench_songs(count=20):
+    """Runs a GetLyrics batch over generated song names and returns the saved songs and seconds."""
+    from tasks import GetLyrics
+
+    songs = [f"Benchmark Song {i}" for i in range(count)]
+    start = time.perf_counter()
+    results = GetLyrics('benchmark', 'benchmark', None).run_batch(songs)
+    return sum(1 for result in results if result['status'] == 'ok'), time.perf_counter() - start
+
+
+def rate_of(name, count, seconds):
+    """Returns the rate in the unit reported for a benchmark: orders/min, rows/sec or songs/min."""
+    if not seconds:
+        return 0.0
+    return count / seconds if name == 'rows' else count / seconds * 60
+
+
+def load_baseline(path):
+    """Returns the rates of the last run recorded in a baseline file."""
+    with open(path, 'r', encoding='utf-8') as file:
+        lines = [line for line in file if line.strip()]
+    return json.loads(lines[-1])['rates']
+
+
+def find_regressions(rates, baseline, tolerance):
+    """Returns the benchmarks whose rate dropped more than ``tolerance`` below the baseline."""
+    return {
+        name: (baseline[name], rate)
+        for name, rate in rates.items()
+        if name in baseline and rate < baseline[name] * (1 - tolerance)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--only', default=','.join(BENCHMARKS), help="comma separated benchmarks to run")
+    parser.add_argument('--latency', type=float, default=0.0, help="seconds the stand-ins add to every request")
+    parser.add_argument('--jitter', type=float, default=0.0, help="extra random latency in seconds")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="fraction of submits and lyric requests that fail")
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--songs', type=int, default=20, help="number of songs in the lyrics batch")
+    parser.add_argument('--backend', default='auto', help="LYRICS_BACKEND used by the lyrics batch")
+    parser.add_argument('--baseline', help="results file of an earlier run to compare against")
+    parser.add_argument('--tolerance', type=float, default=0.2, help="allowed slowdown against the baseline")
+    args = parser.parse_args()
+
+    selected = [name.strip() for name in args.only.split(',') if name.strip()]
+    unknown = set(selected) - set(BENCHMARKS)
+    if unknown:
+        parser.error(f"unknown benchmarks: {', '.join(sorted(unknown))}")
+
+    server = start_standins(latency=args.latency, jitter=args.jitter, error_rate=args.error_rate, seed=args.seed)
+    os.environ.update(server.urls())
+    # Stay offline and never reuse a warm browser or saved state from real runs
+    os.environ['LYRICS_TRANSLATOR'] = 'stub'
+    os.environ['LYRICS_BACKEND'] = args.backend
+    os.environ.pop('CHROME_DEBUG_PORT', None)
+    os.environ.setdefault('DOP_CACHE_ARGS_FILE', os.path.abspath(os.path.join('devdata', 'args.json')))
+
+    runners = {'orders': bench_orders, 'rows': bench_rows, 'songs': lambda: bench_songs(args.songs)}
+    results = {}
+    cwd = os.getcwd()
+    # Journals, caches and outputs go to a scratch directory so every run starts cold
+    with tempfile.TemporaryDirectory(prefix='bench-') as workdir:
+        # Read by browser_session on import, which happens only inside the benchmarks below
+        os.environ['BROWSER_SESSION_DIR'] = os.path.join(workdir, 'session')
+        for name in INPUT_FILES:
+            shutil.copy(os.path.join(cwd, name), workdir)
+        os.chdir(workdir)
+        try:
+            for name in selected:
+                count, seconds = runners[name]()
+                results[name] = {'count': count, 'seconds': round(seconds, 3), 'rate': rate_of(name, count, seconds)}
+        finally:
+            os.chdir(cwd)
+            server.stop()
+
+    print(f"{'Benchmark':<10} {'Count':>6} {'Seconds':>9} {'Rate':>10}  Unit")
+    for name, result in results.items():
+        print(f"{name:<10} {result['count']:>6} {result['seconds']:>9.2f} {result['rate']:>10.2f}  {UNITS[name]}")
+    print(f"Stand-ins: {server.stats()}")
+
+    rates = {name: round(result['rate'], 3) for name, result in results.items()}
+    record = {
+        'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'latency': args.latency,
+        'jitter': args.jitter,
+        'error_rate': args.error_rate,
+        'rates': rates,
+        'results': results,
+        'server': server.stats(),
+    }
+    os.makedirs(os.path.dirname(RESULTS_PATH), exist_ok=True)
+    with open(RESULTS_PATH, 'a', encoding='utf-8') as file:
+        file.write(json.dumps(record) + "\n")
+
+    if args.baseline:
+        regressions = find_regressions(rates, load_baseline(args.baseline), args.tolerance)
+        for name, (expected, actual) in regressions.items():
+            print(f"Regression in {name}: {actual:.2f} {UNITS[name]}, baseline {expected:.2f}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
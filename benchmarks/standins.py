@@ -0,0 +1,412 @@
+"""Local stand-ins for the sites the tasks automate, with configurable latency and error injection.
+
+One HTTP server hosts all three sites under their own path:
+
+- ``/order/``: the robotsparebinindustries.com order form (modal, ``#order``, ``#receipt``,
+  ``.alert.alert-danger``, ``#robot-preview-image`` and ``#order-another``)
+- ``/rpachallenge/``: the rpachallenge.com input form (``ng-reflect-name`` fields)
+- ``/lyrics/``: lyrics.com login, search (``.best-matches``) and song pages (``#lyric-body-text``)
+
+Every request is delayed by ``latency`` plus up to ``jitter`` seconds. Order submits, form submits,
+lyric searches and lyric pages fail with a 500 at ``error_rate``, the way the live sites
+occasionally do. Run ``python -m benchmarks.standins --port 8700`` to start them and print the
+environment variables (ORDER_URL, FORM_URL, LYRICS_URL) that point the tasks at them.
+"""
+import argparse
+import html
+import io
+import json
+import pathlib
+import random
+import re
+import threading
+import time
+import zlib
+from http.cookies import SimpleCookie
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, quote, urlparse
+
+FORM_FIXTURE = pathlib.Path(__file__).parent / 'fixtures' / 'rpachallenge.html'
+PART_COUNT = 6
+PART_COLORS = {'head': (205, 92, 92), 'body': (70, 130, 180), 'legs': (85, 107, 47)}
+PART_HEIGHTS = {'head': 160, 'body': 220, 'legs': 180}
+SESSION_COOKIE = 'lyrics_session'
+
+# Placeholders are replaced with str.replace, since the script is full of braces
+ORDER_PAGE = """<!DOCTYPE html>
+<html>
+<head><meta charset="utf-8"><title>RobotSpareBin Industries (local stand-in)</title></head>
+<body>
+  <div class="modal" id="modal">
+    <p>By using this order form, I give up all my constitutional rights for the benefit of RobotSpareBin Industries Inc.</p>
+    <button type="button" class="btn btn-dark">OK</button>
+  </div>
+  <form id="order-form" hidden onsubmit="return false;">
+    <select class="custom-select" id="head" name="head">
+      <option value="">-- Choose a head --</option>
+      __HEAD_OPTIONS__
+    </select>
+    <div class="stacked">__BODY_OPTIONS__</div>
+    <input type="number" class="form-control" placeholder="Enter the part number for the legs" min="1" max="__PART_COUNT__">
+    <input type="text" class="form-control" id="address" name="address" placeholder="Shipping address">
+    <button type="button" id="order" class="btn btn-primary">Order</button>
+  </form>
+  <div class="alert alert-danger" role="alert" hidden></div>
+  <div id="receipt" class="alert alert-success" role="alert" hidden></div>
+  <div id="robot-preview-image" hidden></div>
+  <button type="button" id="order-another" class="btn btn-primary" hidden>Order another robot</button>
+  <script>
+    const form = document.getElementById('order-form');
+    const modal = document.getElementById('modal');
+    const alertBox = document.querySelector('.alert.alert-danger');
+    const receipt = document.getElementById('receipt');
+    const preview = document.getElementById('robot-preview-image');
+    const another = document.getElementById('order-another');
+
+    document.querySelector('.btn-dark').addEventListener('click', () => {
+      modal.hidden = true;
+      form.hidden = false;
+    });
+
+    document.getElementById('order').addEventListener('click', async () => {
+      alertBox.hidden = true;
+      const order = {
+        head: document.getElementById('head').value,
+        body: (document.querySelector("input[name='body']:checked") || {}).value || '',
+        legs: document.querySelector("input[type='number'].form-control").value,
+        address: document.getElementById('address').value,
+      };
+      const response = await fetch('api/order', {method: 'POST', body: JSON.stringify(order)});
+      if (!response.ok) {
+        alertBox.textContent = 'Internal Server Error';
+        alertBox.hidden = false;
+        return;
+      }
+      const result = await response.json();
+      receipt.innerHTML = `<h3>Receipt</h3><div>${new Date().toISOString()}</div>` +
+        `<p class="badge badge-success">${result.order_number}</p><p>${result.address}</p>` +
+        `<div id="parts" class="alert-success"><div>Head: ${order.head}</div>` +
+        `<div>Body: ${order.body}</div><div>Legs: ${order.legs}</div></div>` +
+        `<p>Thank you for your order! We will ship your robot to you as soon as our warehouse robots ` +
+        `gather the parts you ordered! You will receive your robot in no time!</p>`;
+      preview.innerHTML = ['head', 'body', 'legs']
+        .map(part => `<img src="images/${part}/${order[part]}.png" alt="${part}">`).join('');
+      form.hidden = true;
+      receipt.hidden = false;
+      preview.hidden = false;
+      another.hidden = false;
+    });
+
+    another.addEventListener('click', () => {
+      form.reset();
+      receipt.hidden = true;
+      preview.hidden = true;
+      another.hidden = true;
+      modal.hidden = false;
+    });
+  </script>
+</body>
+</html>
+"""
+
+LYRICS_HEADER = """<!DOCTYPE html>
+<html>
+<head><meta charset="utf-8"><title>{title} | Lyrics.com (local stand-in)</title></head>
+<body>
+  {login}
+  <form id="search-form" action="{base}serp.php" method="get">
+    <input id="search" class="ui-autocomplete-input" type="text" name="st" autocomplete="off">
+    <input type="hidden" name="qtype" value="1">
+    <button id="page-word-search-button" type="submit">Search</button>
+  </form>
+"""
+
+LYRICS_LOGIN = """<a id="user-login" href="#" onclick="document.getElementById('login-form').hidden = false; return false;">Log in</a>
+  <form id="login-form" action="{base}login" method="post" {hidden}>
+    {error}
+    <input id="fld-uname" class="fw" type="text" name="uname">
+    <input id="fld-upass" class="fw" type="password" name="upass">
+    <button type="submit" class="lrg">Log in</button>
+  </form>"""
+
+LYRICS_FOOTER = """
+</body>
+</html>
+"""
+
+
+class StandInServer(ThreadingHTTPServer):
+    """Threaded HTTP server hosting the order, form and lyrics stand-ins."""
+
+    daemon_threads = True
+
+    def __init__(self, address, latency=0.0, jitter=0.0, error_rate=0.0, seed=None):
+        super().__init__(address, StandInHandler)
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.counters = {'requests': 0, 'errors': 0, 'orders': 0, 'rows': 0, 'searches': 0, 'lyrics': 0}
+        self.images = {}
+        self.thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def urls(self):
+        """Returns the task URL overrides that point at the stand-ins."""
+        return {
+            'ORDER_URL': f"{self.base_url}/order/",
+            'FORM_URL': f"{self.base_url}/rpachallenge/",
+            'LYRICS_URL': f"{self.base_url}/lyrics/",
+        }
+
+    def count(self, name):
+        with self.lock:
+            self.counters[name] += 1
+
+    def stats(self):
+        """Returns a copy of the request, injected error and completed action counters."""
+        with self.lock:
+            return dict(self.counters)
+
+    def delay(self):
+        """Returns the injected latency of one request."""
+        with self.lock:
+            return self.latency + self.random.uniform(0, self.jitter) if self.jitter else self.latency
+
+    def should_fail(self):
+        """Decides whether to inject an error into this request."""
+        if not self.error_rate:
+            return False
+        with self.lock:
+            failed = self.random.random() < self.error_rate
+            if failed:
+                self.counters['errors'] += 1
+        return failed
+
+    def part_image(self, part, number):
+        """Returns a generated PNG for a robot part, rendered once per part and number."""
+        key = (part, number)
+        with self.lock:
+            if key in self.images:
+                return self.images[key]
+        from PIL import Image, ImageDraw
+
+        image = Image.new('RGB', (300, PART_HEIGHTS[part]), PART_COLORS[part])
+        ImageDraw.Draw(image).text((10, 10), f"{part} {number}", fill=(255, 255, 255))
+        buffer = io.BytesIO()
+        image.save(buffer, format='PNG')
+        with self.lock:
+            self.images[key] = buffer.getvalue()
+        return self.images[key]
+
+    def start(self):
+        """Serves requests on a daemon thread and returns the server."""
+        self.thread = threading.Thread(target=self.serve_forever, name='standins', daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        """Stops serving and closes the socket."""
+        self.shutdown()
+        self.server_close()
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """Routes requests to the order, form and lyrics stand-ins."""
+
+    server_version = 'StandIn/1.0'
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        self.handle_request('GET')
+
+    def do_POST(self):
+        self.handle_request('POST')
+
+    def handle_request(self, method):
+        self.server.count('requests')
+        time.sleep(self.server.delay())
+        url = urlparse(self.path)
+        routes = (
+            ('GET', r'/order/$', self.order_page),
+            ('POST', r'/order/api/order$', self.order_submit),
+            ('GET', r'/order/images/(head|body|legs)/(\d+)\.png$', self.order_image),
+            ('GET', r'/rpachallenge/$', self.form_page),
+            ('POST', r'/rpachallenge/api/submit$', self.form_submit),
+            ('GET', r'/lyrics/$', self.lyrics_home),
+            ('POST', r'/lyrics/login$', self.lyrics_login),
+            ('GET', r'/lyrics/serp\.php$', self.lyrics_search),
+            ('GET', r'/lyrics/lyric/(\d+)/[^/]*$', self.lyrics_song),
+            ('GET', r'/lyrics/images/album\.png$', self.album_image),
+        )
+        for route_method, pattern, handler in routes:
+            match = re.match(pattern, url.path)
+            if match and route_method == method:
+                handler(parse_qs(url.query), *match.groups())
+                return
+        self.send_text(404, 'Not found')
+
+    def send_text(self, status, body, content_type='text/html; charset=utf-8', headers=None):
+        data = body.encode('utf-8') if isinstance(body, str) else body
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def read_body(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        return self.rfile.read(length).decode('utf-8') if length else ''
+
+    def fail(self):
+        self.send_text(500, 'Internal Server Error')
+
+    # Order site
+
+    def order_page(self, query):
+        head_options = "".join(f'<option value="{i}">Head {i}</option>' for i in range(1, PART_COUNT + 1))
+        body_options = "".join(
+            f'<div class="radio form-check"><label><input type="radio" class="form-check-input" name="body" '
+            f'value="{i}" id="id-body-{i}">Body {i}</label></div>'
+            for i in range(1, PART_COUNT + 1)
+        )
+        page = ORDER_PAGE.replace('__HEAD_OPTIONS__', head_options).replace('__BODY_OPTIONS__', body_options)
+        self.send_text(200, page.replace('__PART_COUNT__', str(PART_COUNT)))
+
+    def order_submit(self, query):
+        if self.server.should_fail():
+            self.fail()
+            return
+        order = json.loads(self.read_body() or '{}')
+        if not all(order.get(part) for part in ('head', 'body', 'legs', 'address')):
+            self.send_text(400, json.dumps({'error': 'missing parts'}), 'application/json')
+            return
+        self.server.count('orders')
+        number = f"RSB-ROBO-ORDER-{self.server.random.randrange(16 ** 8):08X}"
+        result = {'order_number': number, 'address': html.escape(order['address'])}
+        self.send_text(200, json.dumps(result), 'application/json')
+
+    def order_image(self, query, part, number):
+        self.send_text(200, self.server.part_image(part, int(number)), 'image/png')
+
+    # Form challenge
+
+    def form_page(self, query):
+        self.send_text(200, FORM_FIXTURE.read_bytes())
+
+    def form_submit(self, query):
+        if self.server.should_fail():
+            self.fail()
+            return
+        self.server.count('rows')
+        self.send_text(204, b'')
+
+    # Lyrics site
+
+    def logged_in(self):
+        cookie = SimpleCookie(self.headers.get('Cookie', ''))
+        return SESSION_COOKIE in cookie
+
+    def lyrics_page(self, title, content, error=None):
+        if self.logged_in():
+            login = ''
+        else:
+            login = LYRICS_LOGIN.format(
+                base='/lyrics/',
+                hidden='' if error else 'hidden',
+                error=f'<p class="err">{html.escape(error)}</p>' if error else '',
+            )
+        page = LYRICS_HEADER.format(title=html.escape(title), login=login, base='/lyrics/') + content + LYRICS_FOOTER
+        self.send_text(200, page)
+
+    def lyrics_home(self, query):
+        self.lyrics_page('Home', '<h1>Lyrics</h1>')
+
+    def lyrics_login(self, query):
+        form = parse_qs(self.read_body())
+        username = form.get('uname', [''])[0]
+        password = form.get('upass', [''])[0]
+        # Any non-empty credentials log in, except the password "wrong" which exercises the retry path
+        if not username or not password or password == 'wrong':
+            self.lyrics_page('Login', '', error='Invalid username or password.')
+            return
+        self.send_text(303, b'', headers={
+            'Location': '/lyrics/',
+            'Set-Cookie': f"{SESSION_COOKIE}={quote(username)}; Path=/lyrics/",
+        })
+
+    def lyrics_search(self, query):
+        if self.server.should_fail():
+            self.fail()
+            return
+        self.server.count('searches')
+        term = query.get('st', [''])[0].strip()
+        cases = []
+        if term:
+            song_id = zlib.crc32(term.lower().encode('utf-8'))
+            for rank in range(3):
+                title = term.title() if rank == 0 else f"{term.title()} ({['Live', 'Remix'][rank - 1]})"
+                slug = quote(re.sub(r'\s+', '-', title))
+                cases.append(
+                    f'<div class="bm-case">'
+                    f'<div class="album-thumb"><a href="/lyrics/lyric/{song_id + rank}/{slug}">'
+                    f'<img src="/lyrics/images/album.png" alt="album"></a></div>'
+                    f'<div class="bm-label"><b><a href="/lyrics/lyric/{song_id + rank}/{slug}">{html.escape(title)}</a></b></div>'
+                    f'<div class="bm-label"><b><a href="/lyrics/album/{song_id}">Album {song_id % 100}</a></b> '
+                    f'<a href="/lyrics/artist/{song_id % 1000}">Artist {song_id % 1000}</a></div>'
+                    f'</div>'
+                )
+        self.lyrics_page(f'Search: {term}', f'<div class="best-matches">{"".join(cases)}</div>')
+
+    def lyrics_song(self, query, song_id):
+        if self.server.should_fail():
+            self.fail()
+            return
+        self.server.count('lyrics')
+        rng = random.Random(int(song_id))
+        words = ('love', 'night', 'heart', 'road', 'light', 'dream', 'rain', 'fire', 'home', 'sky')
+        lines = [" ".join(rng.choice(words) for _ in range(rng.randint(3, 7))).capitalize() for _ in range(24)]
+        self.lyrics_page(f'Song {song_id}', f'<pre id="lyric-body-text">{html.escape(chr(10).join(lines))}</pre>')
+
+    def album_image(self, query):
+        self.send_text(200, self.server.part_image('head', 0), 'image/png')
+
+
+def start_standins(host='127.0.0.1', port=0, latency=0.0, jitter=0.0, error_rate=0.0, seed=None):
+    """Starts the stand-ins on a background thread and returns the running server."""
+    return StandInServer((host, port), latency, jitter, error_rate, seed).start()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serves local stand-ins of the order, form and lyrics sites.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8700)
+    parser.add_argument('--latency', type=float, default=0.0, help="seconds added to every request")
+    parser.add_argument('--jitter', type=float, default=0.0, help="up to this many extra random seconds per request")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="fraction of submits and lyric requests that fail")
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args()
+
+    server = StandInServer((args.host, args.port), args.latency, args.jitter, args.error_rate, args.seed)
+    for name, url in server.urls().items():
+        print(f"export {name}={url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(json.dumps(server.stats()))
+
+
+if __name__ == '__main__':
+    main()
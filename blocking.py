@@ -0,0 +1,205 @@
+"""Per-task request blocking profiles for Playwright pages and Selenium Chrome sessions.
+
+A profile blocks requests by resource type and URL glob, with allow globs taking precedence.
+Playwright applies it exactly through a route handler. Selenium uses Chrome's
+Network.setBlockedURLs over CDP, which only matches URLs: resource types become file extension
+globs, and a type is left alone when the profile allows some of its URLs, since the CDP block
+list cannot express exceptions.
+
+BLOCK_PROFILE selects another profile for a task, or "none" to load everything.
+"""
+import json
+import os
+import threading
+from fnmatch import fnmatch
+
+# Ad, tracking and web font hosts that none of the tasks read anything from
+THIRD_PARTY_PATTERNS = (
+    '*doubleclick.net*', '*googlesyndication.com*', '*google-analytics.com*', '*googletagmanager.com*',
+    '*googletagservices.com*', '*adservice.google.*', '*amazon-adsystem.com*', '*adnxs.com*',
+    '*criteo.*', '*taboola.com*', '*outbrain.com*', '*pubmatic.com*', '*rubiconproject.com*',
+    '*scorecardresearch.com*', '*quantserve.com*', '*hotjar.com*', '*facebook.net*',
+    '*fonts.googleapis.com*', '*fonts.gstatic.com*',
+)
+
+# File extensions of each resource type, for the URL-only CDP block list
+TYPE_EXTENSIONS = {
+    'image': ('png', 'jpg', 'jpeg', 'gif', 'webp', 'svg', 'ico', 'avif'),
+    'font': ('woff', 'woff2', 'ttf', 'otf', 'eot'),
+    'media': ('mp4', 'webm', 'mp3', 'ogg', 'wav', 'm3u8'),
+}
+
+PROFILES = {
+    # Search results and lyric text only; album art is read from the src attribute, never displayed
+    'lyrics': {
+        'block_types': ('image', 'font', 'media'),
+        'block_patterns': THIRD_PARTY_PATTERNS,
+    },
+    'rpachallenge': {
+        'block_types': ('image', 'font', 'media'),
+        'block_patterns': THIRD_PARTY_PATTERNS,
+    },
+    # The robot part images are the only images the order flow needs
+    'orders': {
+        'block_types': ('image', 'font', 'media'),
+        'block_patterns': THIRD_PARTY_PATTERNS,
+        'allow_patterns': ('*/heads/*', '*/bodies/*', '*/legs/*', '*/order/images/*'),
+    },
+}
+
+
+class BlockingProfile:
+    """Decides which requests to block by resource type and URL glob; allow globs win."""
+
+    def __init__(self, name, block_types=(), block_patterns=(), allow_patterns=()):
+        self.name = name
+        self.block_types = tuple(block_types)
+        self.block_patterns = tuple(block_patterns)
+        self.allow_patterns = tuple(allow_patterns)
+
+    def should_block(self, url, resource_type=None):
+        if any(fnmatch(url, pattern) for pattern in self.allow_patterns):
+            return False
+        if resource_type in self.block_types:
+            return True
+        return any(fnmatch(url, pattern) for pattern in self.block_patterns)
+
+    def cdp_patterns(self):
+        """Returns the URL globs for Network.setBlockedURLs."""
+        patterns = list(self.block_patterns)
+        if not self.allow_patterns:
+            for resource_type in self.block_types:
+                patterns.extend(f"*.{extension}*" for extension in TYPE_EXTENSIONS.get(resource_type, ()))
+        return patterns
+
+
+class BlockStats:
+    """Counts blocked and loaded requests, loaded bytes and page load times of a run."""
+
+    def __init__(self, profile_name=None):
+        self.profile_name = profile_name
+        self.blocked = 0
+        self.loaded = 0
+        self.bytes_loaded = 0
+        self.load_seconds = []
+        self.blocked_counts_known = True
+        self.lock = threading.Lock()
+
+    def record_blocked(self, count=1):
+        with self.lock:
+            self.blocked += count
+
+    def record_loaded(self, size=0, count=1):
+        with self.lock:
+            self.loaded += count
+            self.bytes_loaded += size
+
+    def record_page_load(self, seconds):
+        with self.lock:
+            self.load_seconds.append(seconds)
+
+    def format(self):
+        blocked = self.blocked if self.blocked_counts_known else 'n/a'
+        load = (
+            f"{sum(self.load_seconds) / len(self.load_seconds):.2f}s average page load over {len(self.load_seconds)}"
+            if self.load_seconds else "no page loads measured"
+        )
+        return (
+            f"Blocking profile {self.profile_name or 'none'}: {blocked} requests blocked, "
+            f"{self.loaded} loaded ({self.bytes_loaded / 1024:.0f} KiB), {load}"
+        )
+
+
+def get_profile(default_name):
+    """Returns the profile named by BLOCK_PROFILE, or the task's default, or None for "none"."""
+    name = os.environ.get("BLOCK_PROFILE", default_name)
+    if not name or name == 'none':
+        return None
+    try:
+        return BlockingProfile(name, **PROFILES[name])
+    except KeyError:
+        raise ValueError(f"Unknown blocking profile '{name}', expected one of {', '.join(PROFILES)} or none")
+
+
+# Playwright
+
+def route_handler(profile, stats):
+    """Returns a sync Playwright route handler that aborts the requests the profile blocks."""
+    def handle(route):
+        request = route.request
+        if profile.should_block(request.url, request.resource_type):
+            stats.record_blocked()
+            route.abort()
+        else:
+            route.continue_()
+    return handle
+
+
+def async_route_handler(profile, stats):
+    """Returns an async Playwright route handler that aborts the requests the profile blocks."""
+    async def handle(route):
+        request = route.request
+        if profile.should_block(request.url, request.resource_type):
+            stats.record_blocked()
+            await route.abort()
+        else:
+            await route.continue_()
+    return handle
+
+
+def response_listener(stats):
+    """Returns a Playwright response listener counting loaded requests and their declared sizes."""
+    def listen(response):
+        stats.record_loaded(int(response.headers.get('content-length') or 0))
+    return listen
+
+
+# Selenium
+
+def enable_cdp_blocking(driver, profile):
+    """Blocks the profile's URL globs in a Chromium WebDriver session through CDP.
+
+    Returns False when the browser does not speak CDP, e.g. Firefox, and nothing was blocked.
+    """
+    if not hasattr(driver, 'execute_cdp_cmd'):
+        print(f"Blocking profile {profile.name} skipped: the browser does not support CDP")
+        return False
+    driver.execute_cdp_cmd('Network.enable', {})
+    driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': profile.cdp_patterns()})
+    return True
+
+
+NAVIGATION_SCRIPT = """
+const [navigation] = performance.getEntriesByType('navigation');
+const resources = performance.getEntriesByType('resource');
+return {
+    load: navigation ? (navigation.loadEventEnd || navigation.domContentLoadedEventEnd) / 1000 : null,
+    requests: resources.length + 1,
+    bytes: resources.reduce((total, entry) => total + (entry.transferSize || 0), navigation ? navigation.transferSize || 0 : 0),
+};
+"""
+
+
+def record_selenium_page(driver, stats):
+    """Adds the load time and loaded requests of the current page, and blocked requests when Chrome logs them.
+
+    Blocked requests are read from the performance log, which is only available when the session
+    was started with the goog:loggingPrefs performance capability. Never raises, since the
+    statistics must not break the task.
+    """
+    try:
+        page = driver.execute_script(NAVIGATION_SCRIPT)
+    except Exception:
+        return
+    if page.get('load'):
+        stats.record_page_load(page['load'])
+    stats.record_loaded(page.get('bytes') or 0, page.get('requests') or 0)
+    try:
+        entries = driver.get_log('performance')
+    except Exception:
+        stats.blocked_counts_known = False
+        return
+    for entry in entries:
+        message = json.loads(entry['message'])['message']
+        if message.get('method') == 'Network.loadingFailed' and message['params'].get('blockedReason') == 'inspector':
+            stats.record_blocked()
@@ -0,0 +1,187 @@
+"""Warm Chrome sessions shared between task runs.
+
+Start a long-lived browser once with ``python -m browser_session --port 9222``; tasks given the
+same port (CHROME_DEBUG_PORT) attach to it instead of launching Chrome, and keep it running when
+they finish. Without a running browser, tasks launch Chrome on a reusable profile directory.
+The profile and saved cookies live in BROWSER_SESSION_DIR, by default ~/.cache/robocorp_pratice.
+"""
+import argparse
+import json
+import os
+import shutil
+import socket
+import subprocess
+import tempfile
+import time
+
+from selenium.common.exceptions import WebDriverException
+
+# Outside the output folder, which robot.yaml uploads as artifacts, since these hold the logged-in session
+SESSION_FOLDER = os.environ.get("BROWSER_SESSION_DIR", os.path.join(os.path.expanduser('~'), '.cache', 'robocorp_pratice'))
+PROFILE_FOLDER = os.path.join(SESSION_FOLDER, 'chrome-profile')
+COOKIE_JAR_PATH = os.path.join(SESSION_FOLDER, 'cookies.json')
+# Files Chrome keeps in a profile directory while an instance is using it
+PROFILE_LOCK_FILES = ('SingletonLock', 'lockfile')
+CHROME_BINARIES = ('google-chrome', 'google-chrome-stable', 'chromium', 'chromium-browser', 'chrome')
+
+
+def debug_port():
+    """Returns the DevTools port of the warm browser from CHROME_DEBUG_PORT, or None."""
+    port = os.environ.get("CHROME_DEBUG_PORT")
+    return int(port) if port else None
+
+
+def is_port_open(port, host='127.0.0.1', timeout=0.5):
+    """Checks whether something is listening on the given port."""
+    try:
+        with socket.create_connection((host, port), timeout=timeout):
+            return True
+    except OSError:
+        return False
+
+
+def attach_or_launch_chrome(port=None, profile_dir=PROFILE_FOLDER, options=None, performance_log=False):
+    """Returns ``(driver, attached)``, attaching to a warm Chrome on ``port`` when one is running.
+
+    Otherwise launches Chrome on ``profile_dir`` so the profile, cache and logins survive between runs.
+    Chrome allows one instance per profile, so when another run holds it this run gets a
+    temporary profile, removed by release_chrome. ``performance_log`` turns on Chrome's
+    performance log, which records blocked requests.
+    """
+    # Imported here since selenium.webdriver loads every browser driver, which modules that only
+    # need the helpers below should not pay for
+    from selenium import webdriver
+
+    options = options or webdriver.ChromeOptions()
+    if performance_log:
+        options.set_capability('goog:loggingPrefs', {'performance': 'ALL'})
+    if port and is_port_open(port):
+        options.debugger_address = f"127.0.0.1:{port}"
+        return webdriver.Chrome(options=options), True
+
+    os.makedirs(profile_dir, exist_ok=True)
+    temp_profile = None
+    if profile_locked(profile_dir):
+        temp_profile = profile_dir = tempfile.mkdtemp(prefix='chrome-profile-')
+    profile_argument = f"--user-data-dir={os.path.abspath(profile_dir)}"
+    options.add_argument(profile_argument)
+    try:
+        driver = webdriver.Chrome(options=options)
+    except WebDriverException:
+        if temp_profile:
+            raise
+        # Another run took the profile between the check and the launch
+        options.arguments.remove(profile_argument)
+        temp_profile = tempfile.mkdtemp(prefix='chrome-profile-')
+        options.add_argument(f"--user-data-dir={temp_profile}")
+        driver = webdriver.Chrome(options=options)
+    driver.temp_profile = temp_profile
+    return driver, False
+
+
+def profile_locked(profile_dir):
+    """Checks whether a running Chrome holds the profile directory."""
+    return any(os.path.lexists(os.path.join(profile_dir, name)) for name in PROFILE_LOCK_FILES)
+
+
+def release_chrome(driver, attached):
+    """Closes a launched browser, but only disconnects from a warm one so it keeps running."""
+    if attached:
+        driver.service.stop()
+    else:
+        driver.quit()
+        temp_profile = getattr(driver, 'temp_profile', None)
+        if temp_profile:
+            shutil.rmtree(temp_profile, ignore_errors=True)
+
+
+def save_cookies(driver, path=COOKIE_JAR_PATH):
+    """Writes the cookies of the current site to the cookie jar, merged with other sites already in it."""
+    jar = load_cookie_jar(path)
+    for cookie in driver.get_cookies():
+        jar[f"{cookie.get('domain')}|{cookie.get('path')}|{cookie['name']}"] = cookie
+    folder = os.path.dirname(path)
+    if folder:
+        os.makedirs(folder, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as file:
+        json.dump(list(jar.values()), file, indent=2)
+
+
+def load_cookie_jar(path=COOKIE_JAR_PATH):
+    """Returns the saved cookies keyed by domain, path and name."""
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r', encoding='utf-8') as file:
+        cookies = json.load(file)
+    return {f"{cookie.get('domain')}|{cookie.get('path')}|{cookie['name']}": cookie for cookie in cookies}
+
+
+def load_cookies(driver, path=COOKIE_JAR_PATH):
+    """Adds the saved cookies that belong to the current site and returns how many were added.
+
+    Expired cookies and cookies of other domains are skipped.
+    """
+    added = 0
+    now = time.time()
+    for cookie in load_cookie_jar(path).values():
+        if cookie.get('expiry') and cookie['expiry'] < now:
+            continue
+        try:
+            driver.add_cookie(cookie)
+            added += 1
+        except WebDriverException:
+            pass
+    return added
+
+
+def find_chrome():
+    """Returns the Chrome executable from CHROME_BINARY or the PATH."""
+    binary = os.environ.get("CHROME_BINARY")
+    if binary:
+        return binary
+    for name in CHROME_BINARIES:
+        path = shutil.which(name)
+        if path:
+            return path
+    raise FileNotFoundError("Chrome not found, set CHROME_BINARY")
+
+
+def start_warm_chrome(port, profile_dir=PROFILE_FOLDER, headless=False):
+    """Launches a detached Chrome with remote debugging on ``port`` and waits until it accepts connections."""
+    if is_port_open(port):
+        return None
+    os.makedirs(profile_dir, exist_ok=True)
+    command = [
+        find_chrome(),
+        f"--remote-debugging-port={port}",
+        f"--user-data-dir={os.path.abspath(profile_dir)}",
+        "--no-first-run",
+        "--no-default-browser-check",
+    ]
+    if headless:
+        command.append("--headless=new")
+    process = subprocess.Popen(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, start_new_session=True)
+    deadline = time.monotonic() + 30
+    while not is_port_open(port):
+        if time.monotonic() > deadline or process.poll() is not None:
+            raise RuntimeError(f"Chrome did not start listening on port {port}")
+        time.sleep(0.1)
+    return process
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Starts a warm Chrome that tasks can attach to.")
+    parser.add_argument('--port', type=int, default=debug_port() or 9222)
+    parser.add_argument('--profile', default=PROFILE_FOLDER)
+    parser.add_argument('--headless', action='store_true')
+    args = parser.parse_args()
+
+    process = start_warm_chrome(args.port, args.profile, args.headless)
+    if process is None:
+        print(f"A browser is already listening on port {args.port}")
+    else:
+        print(f"Chrome {process.pid} listening on port {args.port}; set CHROME_DEBUG_PORT={args.port} to attach")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,11 @@
+"""Hit and miss counters reported by the caches and the local stores."""
+
+
+def hit_stats(hits, misses):
+    """Returns the hit and miss counters of a cache with its hit rate."""
+    lookups = hits + misses
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_rate': hits / lookups if lookups else 0.0,
+    }
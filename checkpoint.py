@@ -0,0 +1,65 @@
+import hashlib
+import json
+import os
+import threading
+
+CHECKPOINT_FOLDER = os.path.join('output', 'checkpoints')
+
+
+class Journal:
+    """Append-only journal of completed row keys, fsync'd after every entry.
+
+    Delete the journal file to start a batch from scratch.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.keys = set()
+        self.lock = threading.Lock()
+
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+
+        if os.path.exists(path):
+            with open(path, 'rb') as file:
+                content = file.read()
+            # A crash in the middle of a write leaves a torn last line, which may be the prefix of
+            # another key; it is cut off so it is neither trusted nor appended onto
+            end = content.rfind(b"\n") + 1
+            if end < len(content):
+                os.truncate(path, end)
+            self.keys.update(line for line in content[:end].decode('utf-8').splitlines() if line)
+
+        self.file = open(path, 'a', encoding='utf-8')
+
+    def __contains__(self, key):
+        return str(key) in self.keys
+
+    def record(self, key):
+        """Durably records a completed row key."""
+        key = str(key)
+        with self.lock:
+            self._write(f"{key}\n")
+            self.keys.add(key)
+
+    def _write(self, text):
+        self.file.write(text)
+        self.file.flush()
+        os.fsync(self.file.fileno())
+
+    def close(self):
+        """Closes the journal file."""
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def row_key(row):
+    """Returns a stable key for a row that has no natural identifier."""
+    data = json.dumps(dict(row), sort_keys=True, default=str)
+    return hashlib.sha256(data.encode('utf-8')).hexdigest()
@@ -0,0 +1,42 @@
+# Reads records for several queries in one round trip. Each query is [containerSelector, fields] and
+# fields map a record key to [selector, attribute, index, default]. A null selector reads the container
+# itself, "text" reads the rendered text, and properties such as href or src are read as resolved by
+# the browser, like WebElement.get_attribute does.
+EXTRACT_SCRIPT = """
+const queries = arguments[0];
+const read = (element, attribute) => {
+    if (attribute === 'text') {
+        return element.innerText.trim();
+    }
+    return attribute in element ? element[attribute] : element.getAttribute(attribute);
+};
+const result = {};
+for (const [name, [containerSelector, fields]] of Object.entries(queries)) {
+    result[name] = [...document.querySelectorAll(containerSelector)].map(container => {
+        const record = {};
+        for (const [key, [selector, attribute, index, fallback]] of Object.entries(fields)) {
+            const matches = selector ? container.querySelectorAll(selector) : [container];
+            const element = matches[index < 0 ? matches.length + index : index];
+            const value = element ? read(element, attribute) : null;
+            record[key] = value === null || value === undefined ? fallback : value;
+        }
+        return record;
+    });
+}
+return result;
+"""
+
+
+def extract_page(driver, queries):
+    """Runs several record queries with a single execute_script call.
+
+    ``queries`` maps a name to ``(container_selector, fields)``, with fields in the
+    ``(selector, attribute, index, default)`` format used by html_select.extract_records.
+    Returns a dictionary mapping each name to its list of records.
+    """
+    return driver.execute_script(EXTRACT_SCRIPT, queries)
+
+
+def extract_records(driver, container_selector, fields):
+    """Returns one record per element matching ``container_selector`` with a single execute_script call."""
+    return extract_page(driver, {'records': (container_selector, fields)})['records']
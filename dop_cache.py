@@ -0,0 +1,215 @@
+"""Caching front for the DOP asset and process argument managers.
+
+With the HTTP-backed managers every ``get_asset`` or ``get_in_arg`` is a round trip to the DOP API.
+CachedAssets and CachedArguments fetch what a task needs in one batch at startup, serve repeated
+reads from memory until ``ttl`` expires, and hold ``set_out_arg`` writes until ``flush``.
+
+Setting DOP_CACHE_ASSETS_FILE or DOP_CACHE_ARGS_FILE swaps the DOP managers for the file-backed
+FileAssets and FileArguments, which read the devdata JSON formats and need no DOP install.
+"""
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from lazy import lazy_instance
+
+OUT_ARGS_PATH = os.path.join('output', 'out_args.json')
+
+
+class FileAssets:
+    """Serves assets from a JSON file shaped like devdata/assets.json."""
+
+    def __init__(self, path):
+        self.path = path
+        self.reads = 0
+
+    def get_asset(self, name):
+        self.reads += 1
+        with open(self.path, 'r', encoding='utf-8') as file:
+            assets = json.load(file)
+        if name not in assets:
+            raise KeyError(f"Asset '{name}' not found in {self.path}")
+        return {'name': name, 'value': assets[name]}
+
+
+class FileArguments:
+    """Serves process arguments from a JSON file shaped like devdata/args.json and writes outputs to ``out_path``."""
+
+    def __init__(self, path, out_path=OUT_ARGS_PATH):
+        self.path = path
+        self.out_path = out_path
+        self.reads = 0
+        self.writes = 0
+
+    def get_in_arg(self, name=None):
+        self.reads += 1
+        with open(self.path, 'r', encoding='utf-8') as file:
+            arguments = json.load(file)
+        if name is None:
+            return arguments
+        if name not in arguments:
+            raise KeyError(f"Argument '{name}' not found in {self.path}")
+        return arguments[name]
+
+    def set_out_arg(self, name, value):
+        self.writes += 1
+        outputs = {}
+        if os.path.exists(self.out_path):
+            with open(self.out_path, 'r', encoding='utf-8') as file:
+                outputs = json.load(file)
+        outputs[name] = value
+        folder = os.path.dirname(self.out_path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        with open(self.out_path, 'w', encoding='utf-8') as file:
+            json.dump(outputs, file, ensure_ascii=False, indent=2)
+
+
+class _TtlCache:
+    """Name to value cache whose entries expire ``ttl`` seconds after they were fetched."""
+
+    def __init__(self, fetch, ttl=300, clock=time.monotonic):
+        self.fetch = fetch
+        self.ttl = ttl
+        self.clock = clock
+        self.entries = {}
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, name):
+        with self.lock:
+            entry = self.entries.get(name)
+            if entry and self.clock() - entry[1] < self.ttl:
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+        value = self.fetch(name)
+        self.put(name, value)
+        return value
+
+    def put(self, name, value):
+        with self.lock:
+            self.entries[name] = (value, self.clock())
+
+    def invalidate(self, name=None):
+        with self.lock:
+            if name is None:
+                self.entries.clear()
+            else:
+                self.entries.pop(name, None)
+
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses, 'entries': len(self.entries)}
+
+
+class CachedAssets:
+    """Reads DOP assets through an in-memory cache with a time to live."""
+
+    def __init__(self, source, ttl=300, clock=time.monotonic):
+        self.source = source
+        # Looked up per call, so a lazily created source is not created before the first read
+        self.cache = _TtlCache(lambda name: self.source.get_asset(name), ttl, clock)
+
+    def prefetch(self, names):
+        """Fetches the given assets concurrently, so startup pays for one round trip instead of one per asset."""
+        names = list(names)
+        if not names:
+            return
+        with ThreadPoolExecutor(max_workers=min(8, len(names))) as pool:
+            for name, asset in zip(names, pool.map(self.source.get_asset, names)):
+                self.cache.put(name, asset)
+
+    def get_asset(self, name):
+        return self.cache.get(name)
+
+    def invalidate(self, name=None):
+        self.cache.invalidate(name)
+
+    def stats(self):
+        return self.cache.stats()
+
+
+class CachedArguments:
+    """Reads DOP process arguments through an in-memory cache and batches output writes.
+
+    ``set_out_arg`` only records the value; ``flush`` sends the latest value of each output once,
+    so an output written for every song of a batch costs one round trip.
+    """
+
+    def __init__(self, source, ttl=300, clock=time.monotonic):
+        self.source = source
+        self.cache = _TtlCache(lambda name: self.source.get_in_arg(name), ttl, clock)
+        self.pending = {}
+        self.lock = threading.Lock()
+
+    def prefetch(self, names=None):
+        """Fetches every input argument with one call, or the given names concurrently if that is not possible."""
+        try:
+            arguments = self.source.get_in_arg()
+        except TypeError:
+            # Managers that need a name cannot list their arguments
+            arguments = None
+        if isinstance(arguments, dict) and all(isinstance(value, dict) for value in arguments.values()):
+            for name, argument in arguments.items():
+                self.cache.put(name, argument)
+            return
+        names = list(names or [])
+        if names:
+            with ThreadPoolExecutor(max_workers=min(8, len(names))) as pool:
+                for name, argument in zip(names, pool.map(self.source.get_in_arg, names)):
+                    self.cache.put(name, argument)
+
+    def get_in_arg(self, name=None):
+        if name is None:
+            return self.source.get_in_arg()
+        return self.cache.get(name)
+
+    def get_values(self, *names):
+        """Returns the value of each named argument."""
+        return {name: self.get_in_arg(name)['value'] for name in names}
+
+    def set_out_arg(self, name, value):
+        with self.lock:
+            self.pending[name] = value
+
+    def flush(self):
+        """Writes the pending outputs and returns how many were written."""
+        with self.lock:
+            pending, self.pending = self.pending, {}
+        for name, value in pending.items():
+            self.source.set_out_arg(name, value)
+        return len(pending)
+
+    def invalidate(self, name=None):
+        self.cache.invalidate(name)
+
+    def stats(self):
+        return dict(self.cache.stats(), pending=len(self.pending))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.flush()
+
+
+def cache_ttl():
+    """Returns the cache time to live in seconds from DOP_CACHE_TTL."""
+    return float(os.environ.get("DOP_CACHE_TTL", "300"))
+
+
+def cached_assets():
+    """Returns cached assets over the file stand-in when DOP_CACHE_ASSETS_FILE is set, otherwise over DOP."""
+    path = os.environ.get("DOP_CACHE_ASSETS_FILE")
+    source = FileAssets(path) if path else lazy_instance('DOP.RPA.Asset', 'Asset')
+    return CachedAssets(source, cache_ttl())
+
+
+def cached_arguments():
+    """Returns cached arguments over the file stand-in when DOP_CACHE_ARGS_FILE is set, otherwise over DOP."""
+    path = os.environ.get("DOP_CACHE_ARGS_FILE")
+    source = FileArguments(path) if path else lazy_instance('DOP.RPA.ProcessArgument', 'ProcessArgument')
+    return CachedArguments(source, cache_ttl())
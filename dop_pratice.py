@@ -1,11 +1,9 @@
 from robocorp.tasks import task
 import time, os
-from DOP.RPA.ProcessArgument import ProcessArgument
-from DOP.RPA.Asset import Asset
-from DOP.RPA.Log import Log
+from dop_cache import cached_arguments, cached_assets
 
-assets = Asset()
-arg_process = ProcessArgument()
+assets = cached_assets()
+arg_process = cached_arguments()
 
 @task
 def test_dop():
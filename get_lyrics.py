@@ -1,25 +1,36 @@
 from robocorp.tasks import task
-from RPA.HTTP import HTTP
-from RPA.Excel.Files import Files
-from RPA.Tables import Tables
-from RPA.Browser.Selenium import Selenium
-from RPA.PDF import PDF
-from PIL import Image
-import time, os
-from deep_translator import GoogleTranslator
-import validators
-from DOP.RPA.Asset import Asset
-
-LYRICS_URL = 'https://www.lyrics.com/'
+import os
+from lazy import lazy_instance
+from dop_cache import cached_assets
+from blocking import BlockStats, enable_cdp_blocking, get_profile, record_selenium_page
+from translation_cache import TranslationCache
+from lyrics_store import sanitize_title
+from lyrics_http import LYRICS_URL, LyricsHttpClient, LyricsUnavailable, SONG_FIELDS, SONG_RESULT_SELECTOR
+from dom_extract import extract_records
+import requests
+
 RETRIES_COUNT = 4
-browser = Selenium()
-assets = Asset()
+# Created on first use, so importing the module does not load Selenium or the DOP client
+browser = lazy_instance('RPA.Browser.Selenium', 'Selenium')
+# Login retries and the lyrics lookup read the same asset, so it is fetched once and kept in memory
+assets = cached_assets()
+translation_cache = None
 
 @task
 def get_browser():
-    """Opens a new browser window."""
+    """Fetches the lyrics over HTTP, opening a browser window only when that fails."""
     try: 
-        browser.open_available_browser(LYRICS_URL)
+        assets.prefetch(['lyrics_user'])
+        if get_lyrics_via_http():
+            return
+        browser.open_available_browser("about:blank")
+        profile = get_profile('lyrics')
+        if profile:
+            enable_cdp_blocking(browser.driver, profile)
+        browser.go_to(LYRICS_URL)
+        block_stats = BlockStats(profile and profile.name)
+        record_selenium_page(browser.driver, block_stats)
+        print(block_stats.format())
         if check_login():
             login()
         get_lyrics()
@@ -36,7 +47,6 @@ def check_login():
 def perform_login(username, password):
     """Performs login using provided username and password."""
     browser.click_element("id:user-login")
-    time.sleep(1)
     browser.input_text_when_element_is_visible("css:#fld-uname.fw", username)
     browser.input_text_when_element_is_visible("css:#fld-upass.fw", password)
     browser.click_element("css:button[type=submit].lrg")
@@ -91,31 +101,27 @@ def get_lyrics():
     else:
         print("Lyrics not found.")
 
+def get_lyrics_via_http():
+    """Searches and fetches the lyrics without a browser and returns True when they were saved."""
+    song_name = assets.get_asset('lyrics_user').get('value').get('song_name')
+    client = LyricsHttpClient(LYRICS_URL)
+    try:
+        song_list = client.search(song_name)
+        if not song_list:
+            return False
+        song_selected = song_list[0]
+        lyrics = client.fetch_lyrics(song_selected['url'])
+    except (requests.RequestException, LyricsUnavailable) as e:
+        print(f"HTTP lookup failed, falling back to the browser: {e}")
+        return False
+    finally:
+        client.close()
+    save_lyrics_to_file(translate_lyrics(lyrics), song_selected.get('title') or song_name)
+    return True
+
 def get_song_list():
-    song_list = []
-    song_elements = browser.find_elements("css:.best-matches .bm-case")
-    for song in song_elements:
-        song_title_element = song.find_element("css selector", ".bm-label a")
-        song_title = song_title_element.text.strip()
-        song_url = song_title_element.get_attribute("href")
-
-        image_element = song.find_element("css selector", ".album-thumb img")
-        image_url = image_element.get_attribute("src") if image_element else None
-
-        album_elements = song.find_elements("css selector", ".bm-label b a")
-        album_title = album_elements[1].text if len(album_elements) > 1 else "No album"
-
-        artist_element = song.find_elements("css selector", ".bm-label a")[-1]
-        artist_name = artist_element.text.strip()
-
-        song_list.append({
-            "title": song_title,
-            "url": song_url,
-            "image_url": image_url,
-            "album_title": album_title,
-            "artist_name": artist_name,
-        })
-    return song_list
+    """Retrieves the list of songs from the search results in a single browser call."""
+    return extract_records(browser.driver, SONG_RESULT_SELECTOR, SONG_FIELDS)
 
 def get_lyrics_from_song():
     """Retrieves lyrics from the specified song URL."""
@@ -129,12 +135,15 @@ def get_lyrics_from_song():
         return None
     
 def translate_lyrics(lyrics):
-    translated = GoogleTranslator(source='auto', target='vi').translate(lyrics)
-    return translated
+    """Translates lyrics to Vietnamese, only sending lines that are not in the translation cache."""
+    global translation_cache
+    if translation_cache is None:
+        translation_cache = TranslationCache()
+    return translation_cache.translate(lyrics, source='auto', target='vi')
 
 def save_lyrics_to_file(lyrics_text, song_title):
     """Saves lyrics to a file with the specified title."""
-    file_name = f'{song_title}.txt'
+    file_name = f'{sanitize_title(song_title)}.txt'
     file_path = os.path.join(os.getcwd(), file_name)
     try:
         # Open the file in write mode and save the lyrics
@@ -0,0 +1,150 @@
+import re
+from html.parser import HTMLParser
+from urllib.parse import urljoin
+
+VOID_ELEMENTS = {
+    'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input',
+    'link', 'meta', 'param', 'source', 'track', 'wbr',
+}
+
+# One simple selector: an optional tag followed by #id, .class, [attr] or [attr=value] parts
+SIMPLE_SELECTOR = re.compile(r"""([\w-]+)|#([\w-]+)|\.([\w-]+)|\[([\w-]+)(?:=["']?([^"'\]]*)["']?)?\]""")
+
+# Attributes whose values are URLs and are resolved against the page URL
+URL_ATTRIBUTES = {'href', 'src'}
+
+
+class Node:
+    """An element of a parsed HTML document."""
+
+    def __init__(self, tag, attrs, parent=None):
+        self.tag = tag
+        self.attrs = attrs
+        self.parent = parent
+        self.children = []
+
+    @property
+    def classes(self):
+        return (self.attrs.get('class') or '').split()
+
+    def elements(self):
+        """Yields every descendant element in document order."""
+        for child in self.children:
+            if isinstance(child, Node):
+                yield child
+                yield from child.elements()
+
+    def text(self):
+        """Returns the text content, with <br> turned into line breaks."""
+        parts = []
+        for child in self.children:
+            if isinstance(child, Node):
+                parts.append("\n" if child.tag == 'br' else child.text())
+            else:
+                parts.append(child)
+        return "".join(parts)
+
+
+class _TreeBuilder(HTMLParser):
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.root = Node('#document', {})
+        self.stack = [self.root]
+
+    def handle_starttag(self, tag, attrs):
+        node = Node(tag, {name: value or '' for name, value in attrs}, self.stack[-1])
+        self.stack[-1].children.append(node)
+        if tag not in VOID_ELEMENTS:
+            self.stack.append(node)
+
+    def handle_startendtag(self, tag, attrs):
+        node = Node(tag, {name: value or '' for name, value in attrs}, self.stack[-1])
+        self.stack[-1].children.append(node)
+
+    def handle_endtag(self, tag):
+        # Close the nearest open element with this tag, ignoring stray end tags
+        for index in range(len(self.stack) - 1, 0, -1):
+            if self.stack[index].tag == tag:
+                del self.stack[index:]
+                return
+
+    def handle_data(self, data):
+        self.stack[-1].children.append(data)
+
+
+def parse_html(html):
+    """Parses an HTML document into a tree of Nodes and returns its root."""
+    builder = _TreeBuilder()
+    builder.feed(html)
+    builder.close()
+    return builder.root
+
+
+def _parse_compound(selector):
+    parts = []
+    for tag, element_id, class_name, attr, value in SIMPLE_SELECTOR.findall(selector):
+        if tag:
+            parts.append(lambda node, tag=tag.lower(): node.tag == tag)
+        elif element_id:
+            parts.append(lambda node, element_id=element_id: node.attrs.get('id') == element_id)
+        elif class_name:
+            parts.append(lambda node, class_name=class_name: class_name in node.classes)
+        elif value:
+            parts.append(lambda node, attr=attr, value=value: node.attrs.get(attr) == value)
+        else:
+            parts.append(lambda node, attr=attr: attr in node.attrs)
+    return lambda node: all(part(node) for part in parts)
+
+
+def select(root, selector):
+    """Returns the elements under ``root`` matching a CSS selector, in document order.
+
+    Supports tag, #id, .class, [attr] and [attr=value] selectors joined by descendant combinators.
+    Like the browser's querySelectorAll, only the matched elements have to be under ``root``;
+    ``root`` and its ancestors can match the leading compounds.
+    """
+    compounds = [_parse_compound(part) for part in selector.split()]
+    matches = []
+    for node in root.elements():
+        if not compounds[-1](node):
+            continue
+        # Match the remaining compounds against the ancestors, right to left
+        remaining = len(compounds) - 2
+        ancestor = node.parent
+        while remaining >= 0 and ancestor is not None:
+            if compounds[remaining](ancestor):
+                remaining -= 1
+            ancestor = ancestor.parent
+        if remaining < 0:
+            matches.append(node)
+    return matches
+
+
+def extract_value(element, selector, attribute='text', index=0, default=None, base_url=None):
+    """Returns one value from the ``index``-th match of ``selector`` under ``element``."""
+    matches = select(element, selector)
+    if not matches or not -len(matches) <= index < len(matches):
+        return default
+    match = matches[index]
+    if attribute == 'text':
+        return match.text().strip()
+    value = match.attrs.get(attribute)
+    if value and base_url and attribute in URL_ATTRIBUTES:
+        value = urljoin(base_url, value)
+    return value if value is not None else default
+
+
+def extract_records(root, container_selector, fields, base_url=None):
+    """Returns one dictionary per container element, built from ``fields``.
+
+    ``fields`` maps each record key to a ``(selector, attribute, index, default)`` tuple,
+    where attribute is an HTML attribute name or "text".
+    """
+    return [
+        {
+            name: extract_value(container, selector, attribute, index, default, base_url)
+            for name, (selector, attribute, index, default) in fields.items()
+        }
+        for container in select(root, container_selector)
+    ]
@@ -0,0 +1,157 @@
+import hashlib
+import os
+import re
+import tempfile
+from collections import OrderedDict
+from urllib.parse import urlparse
+
+import requests
+
+from cache_stats import hit_stats
+
+
+class ImageCache:
+    """Keeps downloaded images on disk keyed by URL and evicts the least recently used files past ``max_bytes``.
+
+    Images read through ``get_bytes`` are also kept in memory, up to ``max_memory_bytes``, so repeated
+    parts never touch the disk again.
+    """
+
+    def __init__(self, cache_dir, max_bytes=50 * 1024 * 1024, session=None, max_memory_bytes=16 * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.max_memory_bytes = max_memory_bytes
+        self.session = session or requests.Session()
+        self.memory = OrderedDict()
+        self.memory_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def path_for(self, url):
+        """Returns the cache file path for a URL."""
+        suffix = os.path.splitext(urlparse(url).path)[1] or '.png'
+        return os.path.join(self.cache_dir, hashlib.sha256(url.encode('utf-8')).hexdigest() + suffix)
+
+    def get_bytes(self, url):
+        """Returns the image content from memory or the disk cache, downloading it only on a miss."""
+        path = self.path_for(url)
+        data = self.memory.get(url)
+        if data is not None:
+            self.hits += 1
+            self.memory.move_to_end(url)
+            self.touch(path)
+            return data
+
+        if os.path.exists(path):
+            self.hits += 1
+            self.touch(path)
+            with open(path, 'rb') as file:
+                data = file.read()
+        else:
+            self.misses += 1
+            data = self.download(url, path)
+
+        self.memory[url] = data
+        self.memory_bytes += len(data)
+        while self.memory_bytes > self.max_memory_bytes and len(self.memory) > 1:
+            _, evicted = self.memory.popitem(last=False)
+            self.memory_bytes -= len(evicted)
+        return data
+
+    def touch(self, path):
+        """Marks a cached file as just used, since eviction orders files by modification time."""
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            # Evicted by a parallel worker sharing the directory; the memory copy is still valid
+            pass
+
+    def download(self, url, path):
+        """Downloads an image into the disk cache and returns its content."""
+        response = self.session.get(url, timeout=30)
+        response.raise_for_status()
+
+        # Write to a temporary file first so concurrent runs never read a partial image
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.part')
+        with os.fdopen(fd, 'wb') as file:
+            file.write(response.content)
+        os.replace(tmp_path, path)
+
+        self.evict(keep=path)
+        return response.content
+
+    def evict(self, keep=None):
+        """Removes the least recently used files until the cache fits in ``max_bytes``.
+
+        ``keep`` is never removed, so an image larger than the cache is still there once written.
+        """
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if name.endswith('.part'):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    def stats(self):
+        """Returns the hit and miss counters of this cache."""
+        return hit_stats(self.hits, self.misses)
+
+    def close(self):
+        """Closes the pooled HTTP session."""
+        self.session.close()
+
+
+class CompositeCache:
+    """Remembers encoded merged robot images in memory by part combination, keeping at most ``max_entries``.
+
+    With a ``debug_dir``, every new composite is also written there as a PNG file.
+    """
+
+    def __init__(self, max_entries=64, debug_dir=None):
+        self.max_entries = max_entries
+        self.debug_dir = debug_dir
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_create(self, key, create):
+        """Returns the composite bytes for ``key``, calling ``create()`` to build them on a miss."""
+        data = self.entries.get(key)
+        if data is not None:
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return data
+
+        self.misses += 1
+        data = create()
+        self.entries[key] = data
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+        if self.debug_dir:
+            os.makedirs(self.debug_dir, exist_ok=True)
+            name = re.sub(r'[^\w.-]', '-', '_'.join(str(part) for part in key))
+            with open(os.path.join(self.debug_dir, f"composite_{name}.png"), 'wb') as file:
+                file.write(data)
+        return data
+
+    def stats(self):
+        """Returns the hit and miss counters of this cache."""
+        return hit_stats(self.hits, self.misses)
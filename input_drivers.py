@@ -0,0 +1,75 @@
+import os
+from abc import ABC, abstractmethod
+
+import waits
+
+# Sets the value through the native setter so frameworks notice it, then fires input and change events
+SET_VALUE_SCRIPT = """
+const [element, value] = arguments;
+const setValue = Object.getOwnPropertyDescriptor(Object.getPrototypeOf(element), 'value').set;
+element.focus();
+setValue.call(element, value);
+element.dispatchEvent(new Event('input', {bubbles: true}));
+element.dispatchEvent(new Event('change', {bubbles: true}));
+"""
+
+
+class InputDriver(ABC):
+    """Strategy for entering text into a Selenium WebElement."""
+
+    name = None
+
+    @abstractmethod
+    def enter_text(self, driver, element, text):
+        """Replaces the element's value with ``text``."""
+
+
+class SendKeysDriver(InputDriver):
+    """Types through WebDriver send_keys, which works headless and in parallel sessions."""
+
+    name = 'send_keys'
+
+    def enter_text(self, driver, element, text):
+        element.clear()
+        element.send_keys(text)
+
+
+class JsValueDriver(InputDriver):
+    """Sets the value directly with JavaScript and dispatches input events, in one round trip."""
+
+    name = 'js'
+
+    def enter_text(self, driver, element, text):
+        driver.execute_script(SET_VALUE_SCRIPT, element, text)
+
+
+class OsTypingDriver(InputDriver):
+    """Types with OS-level key presses through pyautogui.
+
+    Needs a real display and sends keys to whichever window has focus, so only use it when a
+    site rejects the other strategies.
+    """
+
+    name = 'os'
+
+    def __init__(self, interval=0.1):
+        self.interval = interval
+
+    def enter_text(self, driver, element, text):
+        import pyautogui
+
+        element.click()
+        waits.wait_until(lambda: driver.switch_to.active_element == element, timeout=5, name="focus for OS typing")
+        pyautogui.typewrite(text, interval=self.interval)
+
+
+INPUT_DRIVERS = {driver.name: driver for driver in (SendKeysDriver, JsValueDriver, OsTypingDriver)}
+
+
+def get_input_driver(name=None):
+    """Returns the input driver selected by name or by the INPUT_DRIVER environment variable."""
+    name = name or os.environ.get("INPUT_DRIVER", SendKeysDriver.name)
+    try:
+        return INPUT_DRIVERS[name]()
+    except KeyError:
+        raise ValueError(f"Unknown input driver '{name}', expected one of {', '.join(INPUT_DRIVERS)}")
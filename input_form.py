@@ -1,36 +1,97 @@
 from robocorp.tasks import task
 from robocorp import browser
-from RPA.HTTP import HTTP
-from RPA.Excel.Files import Files
-from RPA.Tables import Tables
-from RPA.Browser.Selenium import Selenium
-from RPA.PDF import PDF
+import waits
+import timing
+from timing import span
+from checkpoint import CHECKPOINT_FOLDER, Journal, row_key
+from row_readers import iter_xlsx_rows
+from pdf_writer import IncrementalPdfWriter
+from blocking import BlockStats, get_profile, response_listener, route_handler
 import time, os
+
+FORM_URL = os.environ.get("FORM_URL", "https://www.rpachallenge.com/")
+JOURNAL_PATH = os.path.join(CHECKPOINT_FOLDER, 'input_form.journal')
+PDF_PATH = 'output_pdf.pdf'
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp', '.tiff')
+
+# Form field names that correspond to both Excel keys and the form element names
+FORM_FIELDS = {
+    'labelAddress': 'Address',
+    'labelFirstName': 'First Name',
+    'labelEmail': 'Email',
+    'labelPhone': 'Phone Number',
+    'labelRole': 'Role in Company',
+    'labelCompanyName': 'Company Name',
+    'labelLastName': 'Last Name'
+}
+
+# Sets every field value and fires the events Angular listens to, returning the names of missing fields
+TURBO_FILL_SCRIPT = """(values) => {
+    const setValue = Object.getOwnPropertyDescriptor(HTMLInputElement.prototype, 'value').set;
+    const missing = [];
+    for (const [name, value] of Object.entries(values)) {
+        const input = document.querySelector(`[ng-reflect-name='${name}']`);
+        if (!input) {
+            missing.push(name);
+            continue;
+        }
+        setValue.call(input, value);
+        input.dispatchEvent(new Event('input', {bubbles: true}));
+        input.dispatchEvent(new Event('change', {bubbles: true}));
+    }
+    return missing;
+}"""
+
 @task
 def insert_data_to_form():
     """Automates data insertion into a web form using data from an Excel file, captures screenshots, and exports the images as a PDF."""
     
+    start = time.perf_counter()
+
     # Configure the browser to use 'msedge' with a slow-motion effect to simulate human-like interaction.
+    # FORM_SLOWMO overrides the delay in milliseconds, e.g. 0 together with FORM_FILL_MODE=turbo.
+    options = {}
+    if os.environ.get("FORM_PROFILE_DIR"):
+        # Reuse one browser profile between runs so its cache and cookies are already warm
+        options['persistent_context_directory'] = os.environ["FORM_PROFILE_DIR"]
     browser.configure(
         # browser_engine='msedge',
         headless = False,
-        slowmo=100,
+        slowmo=int(os.environ.get("FORM_SLOWMO", "100")),
+        **options,
     )
     
+    # Skip images, fonts and trackers the form never needs; BLOCK_PROFILE=none loads everything
+    profile = get_profile('rpachallenge')
+    block_stats = BlockStats(profile and profile.name)
+    context = browser.context()
+    if profile:
+        context.route("**/*", route_handler(profile, block_stats))
+    context.on("response", response_listener(block_stats))
+
     #Open the target intranet website.
-    page = open_the_intranet_website("https://www.rpachallenge.com/")
+    with span("browser open"):
+        load_start = time.perf_counter()
+        page = open_the_intranet_website(FORM_URL)
+        block_stats.record_page_load(time.perf_counter() - load_start)
+    print(f"Startup to first action: {time.perf_counter() - start:.2f}s")
+    print(block_stats.format())
     
     # Ensure 'images' directory exists
     os.makedirs('images', exist_ok=True)
     
-    # Read data from the Excel file and fill the web form with each row of data.
-    fill_form_with_excel_data(page)
-    
-    # Export captured screenshots as a single PDF document.
-    export_pdf()
-    pass
+    # Read data from the Excel file and fill the web form with each row of data,
+    # appending every screenshot to the PDF document as soon as it is taken.
+    with open_pdf_writer() as writer:
+        fill_form_with_excel_data(page, writer)
+    print(f"PDF written to {', '.join(writer.files) or 'nothing, no rows were captured'}")
+    print(waits.format_wait_summary())
+    print(timing.report())
     
 
+# True once the challenge has cleared every field after a submit, or removed the form after the last round
+FORM_RESET_CONDITION = "() => [...document.querySelectorAll('input[ng-reflect-name]')].every(input => !input.value)"
+
 def open_the_intranet_website(url):
     """Opens the intranet website using the configured browser and returns the page object."""
     browser.goto(url)
@@ -38,64 +99,103 @@ def open_the_intranet_website(url):
 
 def download_excel_file(url, filename):
     """Downloads an Excel file from a specified URL."""
+    from RPA.HTTP import HTTP
+
     http = HTTP()
     http.download(url, filename)
 
-def fill_form_with_excel_data(page):
-    """Reads data from an Excel file and fills the web form for each row."""
-    excel = Files()
+def fill_form_with_excel_data(page, writer=None, file_path="challenge.xlsx"):
+    """Streams rows from the Excel file and fills the web form for each row, adding each screenshot to ``writer``."""
+    journal = Journal(JOURNAL_PATH)
     try:
-        # Open the Excel workbook once
-        excel.open_workbook("challenge.xlsx")
-        worksheet = excel.read_worksheet_as_table("data", header=True)
-        
-        # Iterate through each row in the worksheet and fill the form
-        for i, row in enumerate(worksheet):
-            print(f"Processing row {i}: {row}")
-            fill_form(page, row)
+        # Iterate through each row in the worksheet and fill the form, skipping rows finished by an earlier run
+        for i, row in enumerate(iter_xlsx_rows(file_path, "data")):
+            key = row_key(row)
+            if key in journal and os.path.exists(screenshot_path_for(row)):
+                print(f"Skipping row {i}: already completed")
+                screenshot_path = screenshot_path_for(row)
+            else:
+                print(f"Processing row {i}: {row}")
+                screenshot_path = fill_form(page, row)
+                if screenshot_path:
+                    journal.record(key)
+            if writer and screenshot_path:
+                writer.add_image(screenshot_path)
     finally:
-        # Always close the workbook
-        excel.close_workbook()
-
-def fill_form(page, row):
-    """Fills the web form with data from a single row of the Excel worksheet and takes a screenshot."""
-    # Define form field names that correspond to both Excel keys and the form element names
-    fields = {
-        'labelAddress': 'Address',
-        'labelFirstName': 'First Name',
-        'labelEmail': 'Email',
-        'labelPhone': 'Phone Number',
-        'labelRole': 'Role in Company',
-        'labelCompanyName': 'Company Name',
-        'labelLastName': 'Last Name'
-    }
-    
+        # Always close the journal
+        journal.close()
+
+def screenshot_path_for(row, index=None):
+    """Returns the screenshot path used for a row, prefixed with its row number when ``index`` is given."""
+    if index is not None:
+        return f"images/{index:05d}_{row.get('First Name', 'unknown')}.png"
+    return f"images/{row.get('First Name', 'unknown')}.png"
+
+def fill_form(page, row, mode=None):
+    """Fills the web form with data from a single row of the Excel worksheet and takes a screenshot.
+
+    Returns the screenshot path, or None when the row could not be submitted.
+    """
     try:
         # Fill each form field using the data from the row
-        for field_name, key in fields.items():
-            selector = f"[ng-reflect-name='{field_name}']"
-            page.fill(selector, str(row.get(key, '')))
+        with span("row fill"):
+            fill_fields(page, row, mode)
         
         # Take a screenshot of the form filled with the current row's data
-        screenshot_path = f"images/{row.get('First Name', 'unknown')}.png"
-        page.screenshot(path=screenshot_path)
+        screenshot_path = screenshot_path_for(row)
+        with span("row screenshot"):
+            page.screenshot(path=screenshot_path)
         
-        # Attempt to click the submit button
+        # Attempt to click the submit button and wait until the form has been cleared for the next row
         page.click(".btn.uiColorButton")
-        time.sleep(1)  # Wait for a second to allow the form to process
+        with waits.timed("form reset"):
+            page.wait_for_function(FORM_RESET_CONDITION, timeout=10000)
+        return screenshot_path
     except Exception as e:
         print(f"Error during form filling: {e}")
+        return None
+
+def open_pdf_writer(output_path=PDF_PATH):
+    """Creates the incremental PDF writer configured by the PDF_* environment variables.
+
+    PDF_MAX_WIDTH downscales pages, PDF_JPEG_QUALITY sets the page quality and
+    PDF_MAX_PAGES / PDF_MAX_MB split the output into numbered files.
+    """
+    max_width = int(os.environ.get("PDF_MAX_WIDTH", "0")) or None
+    max_pages = int(os.environ.get("PDF_MAX_PAGES", "0")) or None
+    max_bytes = int(float(os.environ.get("PDF_MAX_MB", "0")) * 1024 * 1024) or None
+    jpeg_quality = int(os.environ.get("PDF_JPEG_QUALITY", "85"))
+    return IncrementalPdfWriter(output_path, max_width, jpeg_quality, max_pages, max_bytes)
+
+def fill_fields(page, row, mode=None):
+    """Fills the form fields from a row.
+
+    The "turbo" mode, also selected by FORM_FILL_MODE=turbo, sets every field in one page.evaluate
+    call and falls back to page.fill for fields it could not find. Any other mode fills field by field.
+    """
+    mode = mode or os.environ.get("FORM_FILL_MODE", "fields")
+    values = {field_name: str(row.get(key, '')) for field_name, key in FORM_FIELDS.items()}
+
+    if mode == "turbo":
+        missing = page.evaluate(TURBO_FILL_SCRIPT, values)
+    else:
+        missing = list(values)
+
+    for field_name in missing:
+        page.fill(f"[ng-reflect-name='{field_name}']", values[field_name])
 
 def export_pdf():
-    """Combines all screenshots in the 'images' directory into a single PDF document."""
-    pdf = PDF()
-    
-    # Get a list of all image files in the 'images' directory with specified extensions
-    image_files = [os.path.join('images', file) for file in os.listdir('images') if file.lower().endswith(('.png', '.jpg', '.jpeg', '.bmp', '.tiff'))]
+    """Combines all screenshots in the 'images' directory into a PDF document, one page at a time."""
+    # Get a sorted list of all image files in the 'images' directory with specified extensions
+    image_files = sorted(os.path.join('images', file) for file in os.listdir('images') if file.lower().endswith(IMAGE_EXTENSIONS))
     
-    # Add the image files to a new PDF document and save it with the specified name
+    # Add the image files to a new PDF document page by page
     if image_files:  # Ensure there are images to add
-        pdf.add_files_to_pdf(image_files, 'output_pdf.pdf')
+        with open_pdf_writer() as writer:
+            for image_file in image_files:
+                writer.add_image(image_file)
+        return writer.files
     else:
         print("No images found to add to the PDF.")
+        return []
  
@@ -0,0 +1,166 @@
+import asyncio
+import os
+import time
+
+from robocorp.tasks import task
+
+import timing
+import waits
+from checkpoint import Journal, row_key
+from input_form import (
+    FORM_FIELDS, FORM_RESET_CONDITION, FORM_URL, JOURNAL_PATH, TURBO_FILL_SCRIPT, open_pdf_writer,
+    screenshot_path_for,
+)
+from row_readers import iter_xlsx_rows
+from timing import span
+from blocking import BlockStats, async_route_handler, get_profile, response_listener
+
+
+async def fill_fields(page, row, mode=None):
+    """Fills the form fields from a row, like input_form.fill_fields on an async page."""
+    mode = mode or os.environ.get("FORM_FILL_MODE", "fields")
+    values = {field_name: str(row.get(key, '')) for field_name, key in FORM_FIELDS.items()}
+
+    if mode == "turbo":
+        missing = await page.evaluate(TURBO_FILL_SCRIPT, values)
+    else:
+        missing = list(values)
+
+    for field_name in missing:
+        await page.fill(f"[ng-reflect-name='{field_name}']", values[field_name])
+
+
+async def fill_form(page, row, screenshot_path, mode=None):
+    """Fills and submits the form for one row, returning the screenshot path or None when it failed."""
+    try:
+        with span("row fill"):
+            await fill_fields(page, row, mode)
+        with span("row screenshot"):
+            await page.screenshot(path=screenshot_path)
+        await page.click(".btn.uiColorButton")
+        with waits.timed("form reset"):
+            await page.wait_for_function(FORM_RESET_CONDITION, timeout=10000)
+        return screenshot_path
+    except Exception as e:
+        print(f"Error during form filling: {e}")
+        return None
+
+
+async def run_context(index, browser, queue, results, journal, mode=None, profile=None, block_stats=None):
+    """Fills rows from the shared queue in one isolated browser context until it takes a None.
+
+    Screenshots are stored in ``results`` by row number, and the context's row count and time are returned.
+    """
+    context = await browser.new_context()
+    block_stats = block_stats or BlockStats()
+    if profile:
+        await context.route("**/*", async_route_handler(profile, block_stats))
+    context.on("response", response_listener(block_stats))
+    rows = 0
+    try:
+        page = await context.new_page()
+        load_start = time.perf_counter()
+        await page.goto(FORM_URL)
+        block_stats.record_page_load(time.perf_counter() - load_start)
+        start = time.perf_counter()
+        while True:
+            item = await queue.get()
+            if item is None:
+                break
+            i, row = item
+            key = row_key(row)
+            screenshot_path = screenshot_path_for(row, i)
+            if key in journal and os.path.exists(screenshot_path):
+                print(f"Skipping row {i}: already completed")
+                results[i] = screenshot_path
+                continue
+            print(f"Context {index} processing row {i}: {row}")
+            results[i] = await fill_form(page, row, screenshot_path, mode)
+            if results[i]:
+                journal.record(key)
+                rows += 1
+        elapsed = time.perf_counter() - start
+    finally:
+        await context.close()
+    return {'context': index, 'rows': rows, 'seconds': elapsed}
+
+
+async def feed_rows(rows, queue, contexts):
+    """Puts the numbered rows on the bounded queue as the contexts take them, then one None per context."""
+    try:
+        for item in enumerate(rows):
+            await queue.put(item)
+    finally:
+        # Always end every context, also when reading the rows fails, so none waits forever
+        for _ in range(contexts):
+            await queue.put(None)
+
+
+async def fill_rows_in_contexts(rows, contexts=4, mode=None, headless=True, slowmo=0):
+    """Fills the rows with ``contexts`` isolated contexts of one browser, taking rows from a shared queue.
+
+    Rows are read from ``rows`` only a few ahead of the contexts, so large workbooks are still streamed.
+    Returns the screenshot paths in row order (None for failed rows) and the statistics of each context.
+    """
+    from playwright.async_api import async_playwright
+
+    contexts = max(1, contexts)
+    queue = asyncio.Queue(maxsize=contexts * 2)
+
+    results = {}
+    profile = get_profile('rpachallenge')
+    block_stats = BlockStats(profile and profile.name)
+    journal = Journal(JOURNAL_PATH)
+    try:
+        async with async_playwright() as playwright:
+            with span("browser open"):
+                browser = await playwright.chromium.launch(headless=headless, slow_mo=slowmo)
+            producer = asyncio.ensure_future(feed_rows(rows, queue, contexts))
+            try:
+                context_stats = await asyncio.gather(
+                    *(run_context(i, browser, queue, results, journal, mode, profile, block_stats)
+                      for i in range(contexts))
+                )
+                await producer
+            finally:
+                producer.cancel()
+                await browser.close()
+    finally:
+        journal.close()
+    print(block_stats.format())
+    return [results[i] for i in sorted(results)], context_stats
+
+
+def print_context_summary(context_stats, elapsed):
+    """Prints the rows and rows/sec of each context and of the whole run."""
+    print(f"{'Context':>7} {'Rows':>6} {'Seconds':>9} {'Rows/sec':>9}")
+    for stats in context_stats:
+        rate = stats['rows'] / stats['seconds'] if stats['seconds'] else 0.0
+        print(f"{stats['context']:>7} {stats['rows']:>6} {stats['seconds']:>9.1f} {rate:>9.2f}")
+    total = sum(stats['rows'] for stats in context_stats)
+    rate = total / elapsed if elapsed else 0.0
+    print(f"{'Total':>7} {total:>6} {elapsed:>9.1f} {rate:>9.2f}")
+
+
+@task
+def insert_data_to_form_parallel():
+    """Fills the Excel rows with FORM_CONTEXTS browser contexts in parallel and exports the screenshots in row order."""
+    contexts = int(os.environ.get("FORM_CONTEXTS", "4"))
+    headless = os.environ.get("FORM_HEADLESS", "true").lower() not in ('0', 'false', 'no')
+    slowmo = int(os.environ.get("FORM_SLOWMO", "0"))
+    os.makedirs('images', exist_ok=True)
+
+    start = time.perf_counter()
+    screenshots, context_stats = asyncio.run(
+        fill_rows_in_contexts(iter_xlsx_rows("challenge.xlsx", "data"), contexts, headless=headless, slowmo=slowmo)
+    )
+    print_context_summary(context_stats, time.perf_counter() - start)
+
+    # Contexts finish rows out of order, so the PDF is only written once every row is done
+    with open_pdf_writer() as writer:
+        for screenshot_path in screenshots:
+            if screenshot_path:
+                writer.add_image(screenshot_path)
+    print(f"PDF written to {', '.join(writer.files) or 'nothing, no rows were captured'}")
+    print(waits.format_wait_summary())
+    print(timing.report())
@@ -0,0 +1,43 @@
+import importlib
+import threading
+
+
+class LazyObject:
+    """Stands in for an object that is only created when one of its attributes is first used.
+
+    Lets task modules declare module-level library instances such as ``browser = Selenium()``
+    without importing the library or starting anything at import time.
+    """
+
+    def __init__(self, factory):
+        object.__setattr__(self, '_factory', factory)
+        object.__setattr__(self, '_instance', None)
+        object.__setattr__(self, '_lock', threading.Lock())
+
+    def _resolve(self):
+        instance = object.__getattribute__(self, '_instance')
+        if instance is None:
+            with object.__getattribute__(self, '_lock'):
+                instance = object.__getattribute__(self, '_instance')
+                if instance is None:
+                    instance = object.__getattribute__(self, '_factory')()
+                    object.__setattr__(self, '_instance', instance)
+        return instance
+
+    def __getattr__(self, name):
+        return getattr(self._resolve(), name)
+
+    def __setattr__(self, name, value):
+        setattr(self._resolve(), name, value)
+
+    def __repr__(self):
+        instance = object.__getattribute__(self, '_instance')
+        return f"<LazyObject {'not created' if instance is None else repr(instance)}>"
+
+
+def lazy_instance(module_name, class_name, *args, **kwargs):
+    """Returns a LazyObject that imports ``module_name`` and instantiates ``class_name`` on first use."""
+    def create():
+        module = importlib.import_module(module_name)
+        return getattr(module, class_name)(*args, **kwargs)
+    return LazyObject(create)
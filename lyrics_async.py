@@ -0,0 +1,182 @@
+import asyncio
+import os
+import time
+
+from robocorp.tasks import task
+
+from lyrics_http import LyricsHttpClient, LyricsUnavailable, load_songs
+from lyrics_store import sanitize_title
+from translation_cache import TranslationCache, Translator
+
+OUTPUT_FOLDER = 'output'
+
+
+class TokenBucket:
+    """Async token bucket allowing ``rate`` acquisitions per second with bursts of up to ``capacity``."""
+
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity or max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self):
+        """Waits until a token is available and takes it."""
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class RateLimitedTranslator(Translator):
+    """Takes a token from an async TokenBucket before every translate_lines call made from a worker thread.
+
+    TranslationCache sends one call per chunk of uncached lines and none on a full cache hit, so
+    limiting the calls rather than the songs bounds the requests the translator actually receives.
+    """
+
+    def __init__(self, translator, bucket, loop):
+        self.translator = translator
+        self.bucket = bucket
+        self.loop = loop
+
+    def translate_lines(self, lines, source, target):
+        asyncio.run_coroutine_threadsafe(self.bucket.acquire(), self.loop).result()
+        return self.translator.translate_lines(lines, source, target)
+
+
+class LyricsPipeline:
+    """Runs search, lyric fetch, translation and saving concurrently across many songs.
+
+    Each stage has its own concurrency limit, lyrics.com and the translator each have a token
+    bucket rate limit, and every song is cancelled after ``song_timeout`` seconds. The blocking
+    HTTP client and translation cache run in worker threads; a thread cannot be cancelled, so it
+    keeps its stage slot until it returns, and ``run`` waits for such threads before finishing.
+    """
+
+    def __init__(self, client=None, translations=None, search_concurrency=4, fetch_concurrency=4,
+                 translate_concurrency=2, site_rate=2.0, translator_rate=1.0, song_timeout=60,
+                 output_folder=OUTPUT_FOLDER):
+        self.client = client or LyricsHttpClient()
+        self.translations = translations or TranslationCache()
+        self.search_concurrency = search_concurrency
+        self.fetch_concurrency = fetch_concurrency
+        self.translate_concurrency = translate_concurrency
+        self.site_rate = site_rate
+        self.translator_rate = translator_rate
+        self.song_timeout = song_timeout
+        self.output_folder = output_folder
+
+    async def run(self, songs):
+        """Processes every song and returns one status record per song, in input order."""
+        # Semaphores and buckets must be created inside the running event loop
+        self.search_slots = asyncio.Semaphore(self.search_concurrency)
+        self.fetch_slots = asyncio.Semaphore(self.fetch_concurrency)
+        self.translate_slots = asyncio.Semaphore(self.translate_concurrency)
+        self.site_limit = TokenBucket(self.site_rate)
+        self.translator_limit = TokenBucket(self.translator_rate)
+        self.threads = set()
+
+        translator = self.translations.translator
+        self.translations.translator = RateLimitedTranslator(translator, self.translator_limit, asyncio.get_running_loop())
+        start = time.perf_counter()
+        try:
+            results = await asyncio.gather(*(self.process(song_name) for song_name in songs))
+        finally:
+            # Threads of timed out songs may still translate, and must stay rate limited
+            if self.threads:
+                await asyncio.gather(*self.threads, return_exceptions=True)
+            self.translations.translator = translator
+        elapsed = time.perf_counter() - start
+
+        done = sum(1 for result in results if result['status'] == 'ok')
+        rate = done / elapsed * 60 if elapsed else 0.0
+        print(f"{done}/{len(results)} songs in {elapsed:.1f}s ({rate:.1f} songs/min)")
+        return results
+
+    async def process(self, song_name):
+        """Runs one song through every stage within the song timeout."""
+        start = time.perf_counter()
+        record = {'song_name': song_name, 'status': 'error', 'file': None, 'error': None}
+        try:
+            record['file'] = await asyncio.wait_for(self.process_song(song_name), self.song_timeout)
+            record['status'] = 'ok' if record['file'] else 'not_found'
+        except asyncio.TimeoutError:
+            record['status'] = 'timeout'
+        except LyricsUnavailable as e:
+            record['status'] = 'not_found'
+            record['error'] = str(e)
+        except Exception as e:
+            record['error'] = str(e)
+        record['seconds'] = round(time.perf_counter() - start, 3)
+        return record
+
+    async def in_thread(self, slots, limit, func, *args):
+        """Runs ``func`` in a worker thread holding one of ``slots`` until the thread returns.
+
+        Takes a token from ``limit`` first when given. Cancelling the caller does not release the
+        slot early, since the thread keeps running.
+        """
+        await slots.acquire()
+        try:
+            if limit:
+                await limit.acquire()
+            future = asyncio.get_running_loop().run_in_executor(None, func, *args)
+        except BaseException:
+            slots.release()
+            raise
+
+        def finished(_):
+            slots.release()
+            self.threads.discard(future)
+
+        self.threads.add(future)
+        future.add_done_callback(finished)
+        return await asyncio.shield(future)
+
+    async def process_song(self, song_name):
+        song_list = await self.in_thread(self.search_slots, self.site_limit, self.client.search, song_name)
+        if not song_list:
+            return None
+        song_selected = song_list[0]
+
+        lyrics = await self.in_thread(self.fetch_slots, self.site_limit, self.client.fetch_lyrics, song_selected['url'])
+        translated = await self.in_thread(self.translate_slots, None, self.translations.translate, lyrics, 'auto', 'vi')
+
+        title = song_selected.get('title') or song_name
+        return await asyncio.to_thread(self.save, translated, title)
+
+    def save(self, lyrics_text, song_title):
+        """Saves lyrics to a file with the specified title and returns its path."""
+        os.makedirs(self.output_folder, exist_ok=True)
+        file_path = os.path.join(self.output_folder, f'{sanitize_title(song_title)}.txt')
+        with open(file_path, 'w', encoding='utf-8') as file:
+            file.write(lyrics_text)
+        return file_path
+
+
+@task
+def get_lyrics_concurrently():
+    """Retrieves and translates lyrics for every song in LYRICS_SONGS_FILE concurrently over HTTP."""
+    songs = [song for song in load_songs(os.environ.get("LYRICS_SONGS_FILE", "songs.json")) if song]
+    pipeline = LyricsPipeline(
+        search_concurrency=int(os.environ.get("LYRICS_SEARCH_CONCURRENCY", "4")),
+        fetch_concurrency=int(os.environ.get("LYRICS_FETCH_CONCURRENCY", "4")),
+        translate_concurrency=int(os.environ.get("LYRICS_TRANSLATE_CONCURRENCY", "2")),
+        site_rate=float(os.environ.get("LYRICS_SITE_RATE", "2")),
+        translator_rate=float(os.environ.get("LYRICS_TRANSLATOR_RATE", "1")),
+        song_timeout=float(os.environ.get("LYRICS_SONG_TIMEOUT", "60")),
+    )
+    try:
+        results = asyncio.run(pipeline.run(songs))
+    finally:
+        pipeline.client.close()
+    for result in results:
+        print(f"{result['song_name']}: {result['status']} in {result['seconds']}s")
+    return results
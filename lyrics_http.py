@@ -0,0 +1,88 @@
+import json
+import os
+from urllib.parse import urljoin
+
+import requests
+
+from html_select import extract_records, parse_html, select
+from row_readers import iter_jsonl_rows
+
+LYRICS_URL = os.environ.get("LYRICS_URL", 'https://www.lyrics.com/')
+SEARCH_PATH = 'serp.php'
+
+SONG_RESULT_SELECTOR = ".best-matches .bm-case"
+LYRICS_SELECTOR = "#lyric-body-text"
+
+# Search result fields as (selector, attribute, index, default), shared by the HTML parser and dom_extract
+SONG_FIELDS = {
+    "title": (".bm-label a", "text", 0, None),
+    "url": (".bm-label a", "href", 0, None),
+    "image_url": (".album-thumb img", "src", 0, None),
+    "album_title": (".bm-label b a", "text", 1, "No album"),
+    "artist_name": (".bm-label a", "text", -1, None),
+}
+
+
+class LyricsUnavailable(Exception):
+    """Raised when a lyrics page can be fetched but has no lyrics, e.g. because a login is required."""
+    pass
+
+
+def parse_song_list(html, base_url=LYRICS_URL):
+    """Returns the search results of a lyrics.com search page."""
+    return extract_records(parse_html(html), SONG_RESULT_SELECTOR, SONG_FIELDS, base_url)
+
+
+def parse_lyrics(html):
+    """Returns the lyrics of a lyrics.com song page, or None when the page has none."""
+    elements = select(parse_html(html), LYRICS_SELECTOR)
+    if not elements:
+        return None
+    return elements[0].text().strip() or None
+
+
+def load_songs(file_path):
+    """Reads song names from a JSON file (a list, or an object with a "songs" list) or a JSONL file."""
+    if file_path.lower().endswith('.jsonl'):
+        items = list(iter_jsonl_rows(file_path))
+    else:
+        with open(file_path, 'r', encoding='utf-8') as file:
+            items = json.load(file)
+        if isinstance(items, dict):
+            items = items.get('songs', [])
+    return [item.get('song_name') if isinstance(item, dict) else item for item in items]
+
+
+class LyricsHttpClient:
+    """Searches lyrics.com and fetches lyric pages over one pooled HTTP session, without a browser."""
+
+    def __init__(self, base_url=LYRICS_URL, session=None, timeout=15):
+        self.base_url = base_url
+        self.session = session or requests.Session()
+        # requests always sets its own python-requests agent; only keep a User-Agent the caller chose
+        user_agent = self.session.headers.get('User-Agent', '')
+        if not user_agent or user_agent.startswith('python-requests'):
+            self.session.headers['User-Agent'] = 'Mozilla/5.0 (compatible; lyrics-robot)'
+        self.timeout = timeout
+
+    def get(self, url, **params):
+        """Fetches a page and returns its HTML."""
+        response = self.session.get(url, params=params or None, timeout=self.timeout)
+        response.raise_for_status()
+        return response.text
+
+    def search(self, query):
+        """Returns the search results for a query, best match first."""
+        html = self.get(urljoin(self.base_url, SEARCH_PATH), st=query, qtype=1)
+        return parse_song_list(html, self.base_url)
+
+    def fetch_lyrics(self, url):
+        """Returns the lyrics of a song page, raising LyricsUnavailable when the page has none."""
+        lyrics = parse_lyrics(self.get(url))
+        if not lyrics:
+            raise LyricsUnavailable(f"No lyrics found at {url}")
+        return lyrics
+
+    def close(self):
+        """Closes the pooled HTTP session."""
+        self.session.close()
@@ -0,0 +1,179 @@
+"""Local store of looked up songs, so a repeated query is answered without searching again.
+
+Every lookup saves the search query, the selected search result (url, title, artist, album), the
+original lyrics and the translation in SQLite. ``search`` runs a full-text query over the stored
+titles, artists and lyrics; SQLite builds without FTS5 fall back to a LIKE scan.
+
+Run ``python -m lyrics_store search WORDS`` to search the store from the command line.
+"""
+import argparse
+import os
+import re
+import sqlite3
+import threading
+import time
+
+from cache_stats import hit_stats
+
+LYRICS_DB_PATH = os.path.join('output', 'lyrics.sqlite3')
+
+SONG_COLUMNS = ('url', 'title', 'artist_name', 'album_title', 'image_url')
+
+
+def normalize_query(query):
+    """Lowercases and collapses whitespace so queries differing only in case or spacing share an entry."""
+    return " ".join(query.split()).lower()
+
+
+def sanitize_title(title, max_length=100):
+    """Returns ``title`` as a file name that is valid on Windows, macOS and Linux."""
+    name = re.sub(r'[<>:"/\\|?*\x00-\x1f]', '_', title or '').strip(' .')
+    return name[:max_length].rstrip(' .') or 'untitled'
+
+
+def store_ttl():
+    """Returns how many seconds stored lyrics stay fresh from LYRICS_STORE_TTL, or None to keep them forever."""
+    ttl = float(os.environ.get("LYRICS_STORE_TTL", "0"))
+    return ttl if ttl > 0 else None
+
+
+class LyricsStore:
+    """SQLite store of songs keyed by normalized query and target language, with full-text search."""
+
+    def __init__(self, path=LYRICS_DB_PATH, ttl=None, clock=time.time):
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        self.ttl = ttl
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.row_factory = sqlite3.Row
+        self.create_songs_table()
+        self.fts = self.create_fts_index()
+        self.connection.commit()
+
+    def create_songs_table(self):
+        """Creates the songs table, moving the rows of a store created before it had an ``id`` column."""
+        columns = [row['name'] for row in self.connection.execute("PRAGMA table_info(songs)")]
+        if columns and 'id' not in columns:
+            # The index and its triggers point at the old rowids, so they are rebuilt from the new table
+            self.connection.executescript(
+                "DROP TRIGGER IF EXISTS songs_ai; DROP TRIGGER IF EXISTS songs_ad;"
+                " DROP TABLE IF EXISTS songs_fts; ALTER TABLE songs RENAME TO songs_old;"
+            )
+        # The full-text index refers to songs by id, which VACUUM never renumbers unlike an implicit rowid
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS songs ("
+            " id INTEGER PRIMARY KEY, query TEXT NOT NULL, target TEXT NOT NULL, url TEXT, title TEXT,"
+            " artist_name TEXT, album_title TEXT, image_url TEXT, lyrics TEXT NOT NULL, translation TEXT,"
+            " fetched_at REAL NOT NULL, UNIQUE (query, target))"
+        )
+        if columns and 'id' not in columns:
+            names = ', '.join(columns)
+            self.connection.execute(f"INSERT INTO songs ({names}) SELECT {names} FROM songs_old")
+            self.connection.execute("DROP TABLE songs_old")
+
+    def create_fts_index(self):
+        """Creates the FTS5 index kept in sync with the songs table, returning False when FTS5 is missing."""
+        missing = not self.connection.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'songs_fts'").fetchone()
+        try:
+            self.connection.execute(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS songs_fts USING fts5("
+                " title, artist_name, album_title, lyrics, translation, content='songs', content_rowid='id')"
+            )
+        except sqlite3.OperationalError:
+            return False
+        self.connection.executescript(
+            "CREATE TRIGGER IF NOT EXISTS songs_ai AFTER INSERT ON songs BEGIN"
+            "  INSERT INTO songs_fts (rowid, title, artist_name, album_title, lyrics, translation)"
+            "  VALUES (new.id, new.title, new.artist_name, new.album_title, new.lyrics, new.translation);"
+            " END;"
+            "CREATE TRIGGER IF NOT EXISTS songs_ad AFTER DELETE ON songs BEGIN"
+            "  INSERT INTO songs_fts (songs_fts, rowid, title, artist_name, album_title, lyrics, translation)"
+            "  VALUES ('delete', old.id, old.title, old.artist_name, old.album_title, old.lyrics, old.translation);"
+            " END;"
+        )
+        if missing:
+            # Indexes the songs already stored, e.g. after moving them to the table with an id column
+            self.connection.execute("INSERT INTO songs_fts (songs_fts) VALUES ('rebuild')")
+        return True
+
+    def get(self, query, target='vi'):
+        """Returns the stored song for a query as a dict, or None when it is missing or older than ``ttl``."""
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT * FROM songs WHERE query = ? AND target = ?", (normalize_query(query), target),
+            ).fetchone()
+        if row is None or (self.ttl is not None and self.clock() - row['fetched_at'] > self.ttl):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return dict(row)
+
+    def put(self, query, song, lyrics, translation, target='vi'):
+        """Saves the selected search result of a query with its lyrics and translation."""
+        values = [normalize_query(query), target, *(song.get(column) for column in SONG_COLUMNS),
+                  lyrics, translation, self.clock()]
+        with self.lock:
+            # An explicit DELETE, since rows removed by INSERT OR REPLACE skip the index trigger
+            self.connection.execute("DELETE FROM songs WHERE query = ? AND target = ?", values[:2])
+            self.connection.execute(
+                f"INSERT INTO songs (query, target, {', '.join(SONG_COLUMNS)}, lyrics, translation,"
+                f" fetched_at) VALUES ({', '.join('?' * len(values))})",
+                values,
+            )
+            self.connection.commit()
+
+    def search(self, text, limit=10):
+        """Returns the stored songs whose title, artist, album or lyrics match ``text``, best matches first."""
+        with self.lock:
+            if self.fts:
+                # Quote every word, so user text is never parsed as FTS query syntax
+                match = " ".join('"{}"'.format(word.replace('"', '""')) for word in text.split())
+                if not match:
+                    return []
+                rows = self.connection.execute(
+                    "SELECT songs.* FROM songs_fts JOIN songs ON songs.id = songs_fts.rowid"
+                    " WHERE songs_fts MATCH ? ORDER BY rank LIMIT ?",
+                    (match, limit),
+                )
+            else:
+                pattern = f"%{text}%"
+                rows = self.connection.execute(
+                    "SELECT * FROM songs WHERE title LIKE ? OR artist_name LIKE ? OR album_title LIKE ?"
+                    " OR lyrics LIKE ? OR translation LIKE ? ORDER BY fetched_at DESC LIMIT ?",
+                    (pattern, pattern, pattern, pattern, pattern, limit),
+                )
+            return [dict(row) for row in rows]
+
+    def stats(self):
+        """Returns the query hit and miss counters."""
+        return hit_stats(self.hits, self.misses)
+
+    def close(self):
+        """Closes the database connection."""
+        self.connection.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Search the stored lyrics.")
+    parser.add_argument('command', choices=['search'])
+    parser.add_argument('words', nargs='+')
+    parser.add_argument('--db', default=LYRICS_DB_PATH)
+    parser.add_argument('--limit', type=int, default=10)
+    args = parser.parse_args()
+
+    store = LyricsStore(args.db)
+    try:
+        for song in store.search(" ".join(args.words), args.limit):
+            print(f"{song['title']} - {song['artist_name']} ({song['album_title']}) {song['url']}")
+    finally:
+        store.close()
+
+
+if __name__ == '__main__':
+    main()
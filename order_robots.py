@@ -1,38 +1,320 @@
 from robocorp.tasks import task
-from RPA.HTTP import HTTP
-from RPA.Excel.Files import Files
-from RPA.Tables import Tables
-from RPA.Browser.Selenium import Selenium
-from RPA.PDF import PDF
 from PIL import Image
-from RPA.Assistant import Assistant
+from image_cache import CompositeCache, ImageCache
+from cache_stats import hit_stats
+from checkpoint import CHECKPOINT_FOLDER, Journal
+from row_readers import iter_csv_rows
+from dom_extract import extract_page
+from browser_session import debug_port, is_port_open, release_chrome
+import waits
+from timing import span
+import timing
+from lazy import lazy_instance
+from blocking import BlockStats, enable_cdp_blocking, get_profile, record_selenium_page
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing.util
+import threading
+import base64
+import io
 import time, os
 
-# Initialize the Selenium browser object
-browser = Selenium()
+# ORDER_URL points the task at another copy of the site, such as the benchmark stand-ins
+ORDER_URL = os.environ.get("ORDER_URL", "https://robotsparebinindustries.com/#/robot-order")
+IMAGE_FOLDER = 'order_images'
+PDF_FOLDER = 'order_details'
+IMAGE_CACHE_FOLDER = os.path.join(IMAGE_FOLDER, 'cache')
+COMPOSITE_FOLDER = os.path.join(IMAGE_FOLDER, 'composites')
+JOURNAL_PATH = os.path.join(CHECKPOINT_FOLDER, 'orders.journal')
+
+# Fields read from the order page, in the (selector, attribute, index, default) format of dom_extract
+RECEIPT_FIELDS = {'html': (None, 'innerHTML', 0, '')}
+IMAGE_FIELDS = {'src': (None, 'src', 0, None)}
+
+# Selenium browser object, created on first use so render worker processes never load Selenium
+browser = lazy_instance('RPA.Browser.Selenium', 'Selenium')
+
+# Robot part image and composite caches, created on first use so every worker process gets its own
+image_cache = None
+composite_cache = None
+
+# Journal of completed order numbers, opened on first use
+journal = None
 
 @task
 def order_robots():
     """Automates the robot ordering process from a CSV file and exports images as a PDF."""
-    browser.open_available_browser("https://robotsparebinindustries.com/#/robot-order", headless=False)
+    attached = open_order_browser()
     process_orders_from_csv("orders.csv")
-    browser.close_browser()
-
-def process_orders_from_csv(file_path):
-    """Reads the CSV file and processes each row to fill in the robot order form."""
-    tables = Tables()
-    csv_data = tables.read_table_from_csv(file_path, header=True)
-
-    for i, row in enumerate(csv_data):
-        click_modal()
-        print(f"Processing row {i}: {row}")
-        fill_order_form(row)
-        browser.click_element("id:order-another")
-        retry_on_error("id:order-another")
-        time.sleep(1)
-
-def fill_order_form(row):
+    close_order_browser(attached)
+    print_cache_stats(collect_cache_stats())
+    close_image_cache()
+    print(waits.format_wait_summary())
+    print(timing.report())
+
+@task
+def order_robots_parallel():
+    """Splits the orders across several browser sessions, set by ORDER_WORKERS, and processes them in parallel."""
+    workers = int(os.environ.get("ORDER_WORKERS", "4"))
+    process_orders_in_parallel("orders.csv", workers)
+
+@task
+def order_robots_pipeline():
+    """Fills orders in the browser while a process pool, set by ORDER_RENDER_WORKERS, renders the PDFs."""
+    render_workers = int(os.environ.get("ORDER_RENDER_WORKERS", "2"))
+    max_pending = int(os.environ.get("ORDER_QUEUE_SIZE", "8"))
+    attached = open_order_browser()
+    try:
+        with OrderPipeline(render_workers, max_pending) as pipeline:
+            process_orders_from_csv("orders.csv", pipeline=pipeline)
+    finally:
+        close_order_browser(attached)
+    print_cache_stats(pipeline.cache_stats())
+    print(waits.format_wait_summary())
+    print(timing.report())
+
+def open_order_browser(headless=False):
+    """Attaches to the warm browser on CHROME_DEBUG_PORT when one is running, otherwise opens a new one.
+
+    Returns whether the browser was attached, and prints the time until the order page is ready.
+    """
+    start = time.perf_counter()
+    port = debug_port()
+    attached = bool(port) and is_port_open(port)
+    with span("browser open", attached=attached):
+        if attached:
+            browser.attach_chrome_browser(port)
+        else:
+            browser.open_available_browser("about:blank", headless=headless)
+        go_to_order_page()
+    source = "warm browser" if attached else "new browser"
+    print(f"Startup to first action: {time.perf_counter() - start:.2f}s ({source})")
+    return attached
+
+def go_to_order_page():
+    """Opens the order page with the blocking profile applied and prints what was blocked."""
+    profile = get_profile('orders')
+    if profile:
+        enable_cdp_blocking(browser.driver, profile)
+    browser.go_to(ORDER_URL)
+    stats = BlockStats(profile and profile.name)
+    record_selenium_page(browser.driver, stats)
+    print(stats.format())
+
+def close_order_browser(attached):
+    """Closes a browser opened by this run and leaves a warm browser running."""
+    if attached:
+        release_chrome(browser.driver, attached)
+    else:
+        browser.close_browser()
+
+def process_orders_from_csv(file_path, folder_path=IMAGE_FOLDER, pipeline=None):
+    """Streams the CSV file and processes each row to fill in the robot order form."""
+    return process_order_rows(iter_csv_rows(file_path), folder_path, pipeline)
+
+def process_order_rows(rows, folder_path=IMAGE_FOLDER, pipeline=None):
+    """Processes the given order rows in the current browser and returns the completed order numbers.
+
+    With a pipeline, only the receipt is captured here and the PDF is rendered by the pipeline.
+    """
+    completed = []
+    for i, row in enumerate(rows):
+        order_id = row.get('Order number', '')
+        if is_order_done(order_id):
+            print(f"Skipping row {i}: order {order_id} is already completed")
+            continue
+
+        with span("order", order_id=order_id):
+            click_modal()
+            print(f"Processing row {i}: {row}")
+            if pipeline is None:
+                fill_order_form(row, folder_path)
+                get_journal().record(order_id)
+            else:
+                order_id = submit_order_form(row)
+                pipeline.put(capture_order_job(order_id, folder_path, order_parts(row)))
+            with span("order another"):
+                browser.click_element("id:order-another")
+                retry_on_error("id:order-another", "css:.btn-dark")
+        completed.append(order_id)
+    return completed
+
+def get_journal():
+    """Returns the order journal of this process, opening it on first use."""
+    global journal
+    if journal is None:
+        journal = Journal(JOURNAL_PATH)
+    return journal
+
+def is_order_done(order_id):
+    """Checks whether the order is in the journal and its PDF is still present."""
+    return order_id in get_journal() and os.path.exists(os.path.join(PDF_FOLDER, f"{order_id}.pdf"))
+
+def process_orders_in_parallel(file_path, workers=4, headless=True):
+    """Splits the CSV rows round-robin across independent browser sessions and merges their results."""
+    # Only the order numbers are kept, the rows themselves are streamed again by each worker
+    pending = [row.get('Order number', '') for row in iter_csv_rows(file_path)]
+    pending = [order_id for order_id in pending if not is_order_done(order_id)]
+    if not pending:
+        print("All orders are already completed.")
+        return []
+    workers = max(1, min(workers, len(pending)))
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [
+            pool.submit(run_order_worker, i, file_path, set(pending[i::workers]), headless) for i in range(workers)
+        ]
+        summaries = [future.result() for future in futures]
+    elapsed = time.perf_counter() - start
+
+    print_worker_summary(summaries, elapsed)
+    print_cache_stats(merge_cache_stats(summary['caches'] for summary in summaries))
+    print(timing.report())
+    order_ids = sorted((order_id for summary in summaries for order_id in summary['order_ids']), key=_order_sort_key)
+    return [os.path.join(PDF_FOLDER, f"{order_id}.pdf") for order_id in order_ids]
+
+def run_order_worker(index, file_path, order_ids, headless=True):
+    """Runs one browser session over the given order numbers of the CSV, writing images to its own folder."""
+    folder_path = os.path.join(IMAGE_FOLDER, f"worker_{index}")
+    rows = (row for row in iter_csv_rows(file_path) if row.get('Order number', '') in order_ids)
+    start = time.perf_counter()
+    with span("browser open", worker=index):
+        browser.open_available_browser("about:blank", headless=headless)
+        go_to_order_page()
+    try:
+        order_ids = process_order_rows(rows, folder_path)
+    finally:
+        browser.close_browser()
+    print(f"Worker {index} waits:\n{waits.format_wait_summary()}")
+    caches = collect_cache_stats()
+    close_image_cache()
+    return {
+        'worker': index,
+        'order_ids': order_ids,
+        'seconds': time.perf_counter() - start,
+        'caches': caches,
+    }
+
+def print_worker_summary(summaries, elapsed):
+    """Prints the number of orders and the throughput of each worker and of the whole run."""
+    print(f"{'Worker':>6} {'Orders':>7} {'Seconds':>9} {'Orders/min':>11}")
+    for summary in summaries:
+        count = len(summary['order_ids'])
+        rate = count / summary['seconds'] * 60 if summary['seconds'] else 0.0
+        print(f"{summary['worker']:>6} {count:>7} {summary['seconds']:>9.1f} {rate:>11.1f}")
+    total = sum(len(summary['order_ids']) for summary in summaries)
+    rate = total / elapsed * 60 if elapsed else 0.0
+    print(f"{'Total':>6} {total:>7} {elapsed:>9.1f} {rate:>11.1f}")
+
+def collect_cache_stats():
+    """Returns the counters of the caches used by this process."""
+    return {
+        'Image cache': get_image_cache().stats(),
+        'Composite cache': get_composite_cache().stats(),
+    }
+
+def print_cache_stats(cache_stats):
+    """Prints the hit and miss counters of each cache."""
+    for name, stats in cache_stats.items():
+        print(f"{name}: {stats['hits']} hits, {stats['misses']} misses, {stats['hit_rate']:.1%} hit rate")
+
+def merge_cache_stats(cache_stats_list):
+    """Adds up the cache counters reported by several processes."""
+    totals = {}
+    for cache_stats in cache_stats_list:
+        for name, stats in cache_stats.items():
+            hits, misses = totals.get(name, (0, 0))
+            totals[name] = (hits + stats['hits'], misses + stats['misses'])
+    return {name: hit_stats(hits, misses) for name, (hits, misses) in totals.items()}
+
+def _order_sort_key(order_id):
+    return (0, int(order_id)) if str(order_id).isdigit() else (1, str(order_id))
+
+class OrderPipeline:
+    """Renders captured orders in a process pool while the browser keeps filling forms.
+
+    At most ``max_pending`` jobs are in flight; ``put`` blocks once that limit is reached.
+    """
+
+    def __init__(self, workers=2, max_pending=8):
+        self.pool = ProcessPoolExecutor(max_workers=workers, initializer=init_render_process)
+        self.slots = threading.BoundedSemaphore(max_pending)
+        self.futures = []
+        self.worker_stats = {}
+
+    def put(self, job):
+        """Queues a captured order for rendering, waiting for a free slot first."""
+        self.slots.acquire()
+        future = self.pool.submit(render_order_job, job)
+        future.add_done_callback(self._job_done)
+        self.futures.append(future)
+
+    def _job_done(self, future):
+        self.slots.release()
+        if not future.cancelled() and future.exception() is None:
+            get_journal().record(future.result()['order_id'])
+
+    def drain(self):
+        """Waits for every queued order to be rendered and returns the PDF paths."""
+        try:
+            results = [future.result() for future in self.futures]
+            for result in results:
+                self.worker_stats[result['pid']] = result['caches']
+            return [result['pdf'] for result in results]
+        finally:
+            self.futures = []
+            self.pool.shutdown(wait=True)
+
+    def cache_stats(self):
+        """Returns the cache counters of the render processes, as of their last job."""
+        return merge_cache_stats(self.worker_stats.values())
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.drain()
+        else:
+            self.pool.shutdown(wait=True, cancel_futures=True)
+
+def init_render_process():
+    """Closes the image cache of a render process when the pool shuts the process down."""
+    multiprocessing.util.Finalize(None, close_image_cache, exitpriority=0)
+
+def capture_order_job(order_id, folder_path=IMAGE_FOLDER, parts=None):
+    """Captures the receipt HTML and robot image URLs needed to render the order later."""
+    order_details_html, image_urls = get_order_details()
+    return {
+        'order_id': order_id,
+        'order_details_html': order_details_html,
+        'image_urls': image_urls,
+        'folder_path': folder_path,
+        'parts': parts,
+    }
+
+def render_order_job(job):
+    """Downloads the images of a captured order, merges them and writes the order PDF."""
+    order_id = job['order_id']
+    images = download_images(job['image_urls'])
+    generate_order_pdf(order_id, job['order_details_html'], images, job['folder_path'], job['parts'])
+    return {
+        'order_id': order_id,
+        'pdf': os.path.join(PDF_FOLDER, f"{order_id}.pdf"),
+        'pid': os.getpid(),
+        'caches': collect_cache_stats(),
+    }
+
+def fill_order_form(row, folder_path=IMAGE_FOLDER):
     """Fills the robot order form with data from the CSV and submits the form."""
+    order_id = submit_order_form(row)
+    generate_order_details(order_id, folder_path, order_parts(row))
+
+def order_parts(row):
+    """Returns the (Head, Body, Legs) combination that fully determines the robot image."""
+    return (row.get('Head', ''), row.get('Body', ''), row.get('Legs', ''))
+
+def submit_order_form(row):
+    """Fills the robot order form, submits it and returns the order number."""
     fields = {
         'class:custom-select': 'Head',
         'class:radio_body': 'Body',
@@ -42,13 +324,14 @@ def fill_order_form(row):
     
     order_id = row.get('Order number', '')
 
-    for selector, field in fields.items():
-        input_field_value(selector, row.get(field, ''))
+    with span("order fill"):
+        for selector, field in fields.items():
+            input_field_value(selector, row.get(field, ''))
 
-    browser.click_element('id:order')
-    retry_on_error('id:order')
-    time.sleep(1)
-    generate_order_details(order_id)
+    with span("order submit"):
+        browser.click_element('id:order')
+        retry_on_error('id:order', 'id:receipt')
+    return order_id
 
 def input_field_value(selector, value):
     """Inputs or selects values for a specific form field."""
@@ -65,66 +348,143 @@ def input_field_value(selector, value):
     else:
         browser.input_text(selector, str(value))
 
-def retry_on_error(retry_selector, max_retries=10):
-    """Retries the action if there is an internal server error."""
-    retry_count = 0
-    while browser.is_element_visible('css:.alert.alert-danger') and retry_count < max_retries:
-        print(f"Internal Server Error detected, retrying... Attempt {retry_count + 1}")
-        browser.click_element(retry_selector)
-        time.sleep(1)
-        retry_count += 1
+def retry_on_error(retry_selector, success_selector, max_retries=10):
+    """Retries the action if there is an internal server error.
 
-    if retry_count == max_retries:
+    Waits until either ``success_selector`` or the error alert is visible, and backs off
+    exponentially with jitter before each retry. Only the error alert is retried: when neither
+    shows up in time the action may still be in progress, and clicking again could repeat it.
+    """
+    for attempt, delay in enumerate(waits.backoff_delays(max_retries), start=1):
+        outcome = wait_for_outcome(success_selector)
+        if outcome == 'success':
+            return
+        if outcome is None:
+            print(f"No result for {retry_selector} in time, not retrying so it is not submitted twice.")
+            return
+        print(f"Internal Server Error detected, retrying... Attempt {attempt}")
+        with span("order retry", attempt=attempt):
+            time.sleep(delay)
+            browser.click_element(retry_selector)
+
+    if wait_for_outcome(success_selector) != 'success':
         print("Max retries reached. Proceeding with caution.")
 
-def generate_order_details(order_id):
+def wait_for_outcome(success_selector, timeout=10):
+    """Waits until the action either succeeded or showed the error alert."""
+    def outcome():
+        if browser.is_element_visible('css:.alert.alert-danger'):
+            return 'error'
+        if browser.is_element_visible(success_selector):
+            return 'success'
+        return None
+
+    try:
+        return waits.wait_until(outcome, timeout, name=f"outcome of {success_selector}")
+    except waits.WaitTimeout:
+        return None
+
+def generate_order_details(order_id, folder_path=IMAGE_FOLDER, parts=None):
     """Retrieves order details and generates a PDF report."""
-    browser.wait_until_element_is_visible("id:receipt", timeout=10)
-    order_details_html = browser.get_element_attribute('id:receipt', 'innerHTML')
-    
-    folder_path = 'order_images'
-    robot_images = download_robot_images(folder_path)
+    order_details_html, image_urls = get_order_details()
 
-    generate_order_pdf(order_id, order_details_html, robot_images, folder_path)
+    robot_images = download_images(image_urls)
 
-def download_robot_images(folder_path, div_id='robot-preview-image'):
-    """Downloads robot images and saves them to the specified folder."""
-    os.makedirs(folder_path, exist_ok=True)
-    image_elements = browser.find_elements(f'css:#{div_id} img')
+    generate_order_pdf(order_id, order_details_html, robot_images, folder_path, parts)
+
+def debug_files_enabled():
+    """Checks whether ORDER_DEBUG_FILES asks for the part and merged images to be written to disk."""
+    return os.environ.get("ORDER_DEBUG_FILES", "").lower() in ('1', 'true', 'yes')
+
+def get_order_details(div_id='robot-preview-image'):
+    """Waits for the receipt and returns its HTML and the robot image URLs, read in one browser call."""
+    with span("order receipt"):
+        browser.wait_until_element_is_visible("id:receipt", timeout=10)
+        page = extract_page(browser.driver, {
+            'receipt': ('#receipt', RECEIPT_FIELDS),
+            'images': (f'#{div_id} img', IMAGE_FIELDS),
+        })
+    order_details_html = page['receipt'][0]['html'] if page['receipt'] else ''
+    return order_details_html, [image['src'] for image in page['images'] if image['src']]
+
+def download_images(urls):
+    """Returns the contents of the given image URLs, downloading only the ones not cached yet."""
+    cache = get_image_cache()
+    with span("image download"):
+        return [cache.get_bytes(src) for src in urls]
 
-    http = HTTP()
-    downloaded_images = []
+def get_image_cache():
+    """Returns the image cache of this process, creating it on first use."""
+    global image_cache
+    if image_cache is None:
+        max_bytes = int(os.environ.get("ORDER_IMAGE_CACHE_MB", "50")) * 1024 * 1024
+        image_cache = ImageCache(IMAGE_CACHE_FOLDER, max_bytes)
+    return image_cache
 
-    for i, img in enumerate(image_elements):
-        src = browser.get_element_attribute(img, 'src')
-        if src:
-            image_path = os.path.join(folder_path, f"robot_part_{i}.png")
-            http.download(src, image_path, overwrite=True)
-            downloaded_images.append(image_path)
+def close_image_cache():
+    """Closes the image cache of this process, if it was created, releasing its pooled connections."""
+    global image_cache
+    if image_cache is not None:
+        image_cache.close()
+        image_cache = None
 
-    return downloaded_images
+def get_composite_cache():
+    """Returns the composite image cache of this process, creating it on first use."""
+    global composite_cache
+    if composite_cache is None:
+        max_entries = int(os.environ.get("ORDER_COMPOSITE_CACHE_SIZE", "64"))
+        debug_dir = os.path.join(COMPOSITE_FOLDER, str(os.getpid())) if debug_files_enabled() else None
+        composite_cache = CompositeCache(max_entries, debug_dir)
+    return composite_cache
 
-def generate_order_pdf(order_id, order_details_html, image_files, folder_path):
-    """Generates a PDF for the order, including the robot images and details."""
-    merged_image_path = os.path.join(folder_path, f"merged_robot_image_{order_id}.png")
-    merge_images(image_files, merged_image_path)
+def generate_order_pdf(order_id, order_details_html, images, folder_path, parts=None):
+    """Generates a PDF for the order, including the robot images and details.
 
+    The images are merged and embedded in memory; when the part combination is given, the merged
+    image is reused from the composite cache. With ORDER_DEBUG_FILES set, the part and merged images
+    are also written to ``folder_path``.
+    """
+    with span("image merge"):
+        if parts:
+            merged_image = get_composite_cache().get_or_create(parts, lambda: merge_images(images))
+        else:
+            merged_image = merge_images(images)
+
+    if debug_files_enabled():
+        write_debug_images(order_id, images, merged_image, folder_path)
+
+    image_uri = "data:image/png;base64," + base64.b64encode(merged_image).decode('ascii')
     html_content = f"""
     <html>
     <body>
         <h1>Order Details: {order_id}</h1>
         {order_details_html}
-        <img src="{merged_image_path}" style="width:100%;">
+        <img src="{image_uri}" style="width:100%;">
     </body>
     </html>
     """
 
-    pdf = PDF()
-    pdf.html_to_pdf(html_content, f"order_details/{order_id}.pdf")
+    with span("order pdf"):
+        from RPA.PDF import PDF
+
+        pdf = PDF()
+        pdf.html_to_pdf(html_content, os.path.join(PDF_FOLDER, f"{order_id}.pdf"))
 
-def merge_images(image_files, output_path, page_width=600):
-    """Merges multiple images vertically and centers them on a white background."""
-    images = [Image.open(img) for img in image_files]
+def write_debug_images(order_id, images, merged_image, folder_path):
+    """Writes the part images and the merged image of an order, named after the order so runs never share files."""
+    os.makedirs(folder_path, exist_ok=True)
+    for i, data in enumerate(images):
+        with open(os.path.join(folder_path, f"robot_part_{order_id}_{i}.png"), 'wb') as file:
+            file.write(data)
+    with open(os.path.join(folder_path, f"merged_robot_image_{order_id}.png"), 'wb') as file:
+        file.write(merged_image)
+
+def merge_images(images, output_path=None, page_width=600):
+    """Merges multiple images vertically, centers them on a white background and returns the PNG bytes.
+
+    ``images`` are image contents or file paths; the result is also saved to ``output_path`` when given.
+    """
+    images = [Image.open(io.BytesIO(img) if isinstance(img, bytes) else img) for img in images]
     total_height = sum(img.height for img in images)
 
     merged_image = Image.new('RGB', (page_width, total_height), (255, 255, 255))
@@ -135,7 +495,13 @@ def merge_images(image_files, output_path, page_width=600):
         merged_image.paste(img, (x_offset, y_offset))
         y_offset += img.height
 
-    merged_image.save(output_path)
+    buffer = io.BytesIO()
+    merged_image.save(buffer, format='PNG')
+    data = buffer.getvalue()
+    if output_path:
+        with open(output_path, 'wb') as file:
+            file.write(data)
+    return data
 
 def click_modal():
     """Clicks the modal button to proceed with the order form."""
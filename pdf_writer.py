@@ -0,0 +1,74 @@
+import os
+
+from PIL import Image
+
+
+class IncrementalPdfWriter:
+    """Appends images to a PDF one page at a time so only the current page is held in memory.
+
+    Pages are stored as JPEG at ``jpeg_quality``, optionally downscaled to ``max_width``. When
+    ``max_pages`` or ``max_bytes`` is set, the output is split into numbered files once a file
+    reaches either limit.
+    """
+
+    def __init__(self, output_path, max_width=None, jpeg_quality=85, max_pages=None, max_bytes=None, resolution=96.0):
+        self.output_path = output_path
+        self.max_width = max_width
+        self.jpeg_quality = jpeg_quality
+        self.max_pages = max_pages
+        self.max_bytes = max_bytes
+        self.resolution = resolution
+        self.files = []
+        self.pages_in_file = 0
+        self.total_pages = 0
+
+        folder = os.path.dirname(output_path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+
+    def add_image(self, image_path):
+        """Appends an image file as a new page."""
+        with Image.open(image_path) as image:
+            page = image.convert('RGB')
+
+        if self.max_width and page.width > self.max_width:
+            height = max(1, round(page.height * self.max_width / page.width))
+            page = page.resize((self.max_width, height), Image.LANCZOS)
+
+        if not self.files or self._file_full():
+            self._start_file()
+
+        page.save(
+            self.files[-1],
+            'PDF',
+            append=self.pages_in_file > 0,
+            resolution=self.resolution,
+            quality=self.jpeg_quality,
+        )
+        page.close()
+        self.pages_in_file += 1
+        self.total_pages += 1
+
+    def close(self):
+        """Returns the paths of the PDF files written so far."""
+        return list(self.files)
+
+    def _file_full(self):
+        if self.max_pages and self.pages_in_file >= self.max_pages:
+            return True
+        return bool(self.max_bytes) and os.path.getsize(self.files[-1]) >= self.max_bytes
+
+    def _start_file(self):
+        if self.max_pages or self.max_bytes:
+            base, extension = os.path.splitext(self.output_path)
+            path = f"{base}_{len(self.files) + 1:03d}{extension}"
+        else:
+            path = self.output_path
+        self.files.append(path)
+        self.pages_in_file = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
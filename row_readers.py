@@ -0,0 +1,52 @@
+import csv
+import json
+
+from openpyxl import load_workbook
+
+
+def iter_csv_rows(file_path, encoding='utf-8'):
+    """Yields the rows of a CSV file with a header line as dictionaries, one at a time."""
+    with open(file_path, 'r', encoding=encoding, newline='') as file:
+        yield from csv.DictReader(file)
+
+
+def iter_xlsx_rows(file_path, sheet_name=None):
+    """Yields the rows of an Excel worksheet as dictionaries keyed by its header row.
+
+    The workbook is opened in read-only mode so rows are streamed instead of loaded at once.
+    Rows with no values and columns with no header are skipped.
+    """
+    workbook = load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        worksheet = workbook[sheet_name] if sheet_name else workbook.active
+        rows = worksheet.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        for values in rows:
+            if all(value is None for value in values):
+                continue
+            yield {key: value for key, value in zip(header, values) if key is not None}
+    finally:
+        workbook.close()
+
+
+def iter_jsonl_rows(file_path, encoding='utf-8'):
+    """Yields one parsed JSON object per non-empty line of a JSONL file."""
+    with open(file_path, 'r', encoding=encoding) as file:
+        for line in file:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+
+
+def iter_rows(file_path, sheet_name=None):
+    """Yields rows from a CSV, xlsx or JSONL file, chosen by the file extension."""
+    extension = file_path.lower().rsplit('.', 1)[-1]
+    if extension == 'csv':
+        return iter_csv_rows(file_path)
+    if extension in ('xlsx', 'xlsm'):
+        return iter_xlsx_rows(file_path, sheet_name)
+    if extension in ('jsonl', 'ndjson'):
+        return iter_jsonl_rows(file_path)
+    raise ValueError(f"Unsupported input file type: {file_path}")
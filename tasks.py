@@ -1,28 +1,50 @@
 from robocorp.tasks import task
-import time, os, sys
-from deep_translator import GoogleTranslator
-from DOP.RPA.Asset import Asset
-from DOP.RPA.ProcessArgument import ProcessArgument
+import time, os, sys, json
 import logging
-from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-import pyautogui as autogui
+from selenium.common.exceptions import WebDriverException
+from input_drivers import get_input_driver
+import waits
+from dop_cache import cached_arguments, cached_assets
+import timing
+from timing import span
+from translation_cache import TranslationCache
+from lyrics_store import LyricsStore, sanitize_title, store_ttl
+from lyrics_http import LYRICS_URL, LyricsHttpClient, LyricsUnavailable, SONG_FIELDS, SONG_RESULT_SELECTOR, load_songs
+from dom_extract import extract_records
+from blocking import BlockStats, enable_cdp_blocking, get_profile, record_selenium_page
+from browser_session import attach_or_launch_chrome, debug_port, load_cookies, release_chrome, save_cookies
+import requests
 
 # Constants
-LYRICS_URL = 'https://www.lyrics.com/'
 RETRIES_COUNT = 4
+BATCH_REPORT_PATH = os.path.join('output', 'trans_song_batch.json')
 
 class LoginError(Exception):
     """Raised when login fails after retries."""
     pass
 
 class GetLyrics:
-    def __init__(self, username, password, song_name):
-        self.args = ProcessArgument()
-        self.assets = Asset()
+    def __init__(self, username, password, song_name, translator=None, input_driver=None):
+        # Cached DOP clients, created on first read; outputs are written when the task finishes
+        self.args = get_arguments()
+        self.assets = get_assets()
         self.browser = None
+        self.attached = False
+        # Text entry strategy: "send_keys" by default, "js", or "os" for pyautogui typing
+        self.input_driver = get_input_driver(input_driver)
+        self.started = time.perf_counter()
+        self.startup_reported = False
+        self.translations = TranslationCache(translator=translator)
+        # Songs already looked up are answered from the local store until LYRICS_STORE_TTL expires
+        self.store = LyricsStore(ttl=store_ttl())
+        self.http = LyricsHttpClient(LYRICS_URL)
+        # "auto" tries plain HTTP first and falls back to the browser, "http" or "browser" use only one
+        self.backend = os.environ.get("LYRICS_BACKEND", "auto")
+        self.block_profile = get_profile('lyrics')
+        self.block_stats = BlockStats(self.block_profile and self.block_profile.name)
         self.username = username
         self.password = password
         self.song_name = song_name
@@ -38,10 +60,16 @@ class GetLyrics:
         return self.args.get_in_arg()
 
     def get_browser(self):
-        """Opens a new browser window using Selenium WebDriver."""
+        """Attaches to the warm browser, or opens a new window on the reusable profile, and restores saved cookies."""
         try:
-            driver = webdriver.Chrome()
-            driver.get(LYRICS_URL)
+            with span("browser open"):
+                driver, self.attached = attach_or_launch_chrome(debug_port(), performance_log=bool(self.block_profile))
+                if self.block_profile:
+                    enable_cdp_blocking(driver, self.block_profile)
+                driver.get(LYRICS_URL)
+                if load_cookies(driver):
+                    driver.refresh()
+            record_selenium_page(driver, self.block_stats)
             return driver
         except Exception as e:
             self.LOGGER.error(f"Error opening browser: {e}")
@@ -50,22 +78,21 @@ class GetLyrics:
     def wait_for_element(self, by, selector, timeout=10):
         """Waits until the element is visible or throws TimeoutException."""
         try:
-            element = WebDriverWait(self.browser, timeout).until(
-                EC.visibility_of_element_located((by, selector))
-            )
+            with waits.timed(f"visible {selector}"):
+                element = WebDriverWait(self.browser, timeout, poll_frequency=waits.POLL_INTERVAL).until(
+                    EC.visibility_of_element_located((by, selector))
+                )
             return element
         except Exception as e:
             self.LOGGER.error(f"Error waiting for element {selector}: {e}")
             return None
 
     def enter_text_in_element(self, by, selector, text):
-        """Click elements and enter input using pyautogui"""
+        """Waits for an element and enters text with the configured input driver."""
         try:
             element = self.wait_for_element(by, selector)
             if element:
-                element.click()
-                time.sleep(0.5)
-                autogui.typewrite(text, interval=0.1)
+                self.input_driver.enter_text(self.browser, element, text)
         except Exception as e:
             self.LOGGER.error(f"Error interacting with element {selector}: {e}")
             raise
@@ -84,7 +111,6 @@ class GetLyrics:
             login_button = self.wait_for_element(By.ID, "user-login")
             if login_button:
                 login_button.click()
-                time.sleep(1)
                 self.enter_text_in_element(By.CSS_SELECTOR, "#fld-uname.fw", username)
                 self.enter_text_in_element(By.CSS_SELECTOR, "#fld-upass.fw", password)
                 submit_button = self.wait_for_element(By.CSS_SELECTOR, "button[type=submit].lrg")
@@ -97,6 +123,7 @@ class GetLyrics:
     def attempt_login(self, username, password):
         """Attempts to login with retries if login fails."""
         retries = 0
+        delays = waits.backoff_delays(RETRIES_COUNT)
         while retries < RETRIES_COUNT:
             # username = self.assets.get_asset("username")['value']
             # password = self.assets.get_asset("password")['value']
@@ -108,69 +135,119 @@ class GetLyrics:
                 raise LoginError("Login cancelled by user")
 
             try:
-                self.perform_login(username, password)
-                if not self.wait_for_element(By.CSS_SELECTOR, "p.err"):
+                with span("login", attempt=retries + 1):
+                    self.perform_login(username, password)
+                    outcome = self.wait_for_login_outcome()
+                if outcome == 'success':
                     self.LOGGER.info("Login successful.")
+                    save_cookies(self.browser)
                     return
-                else:
-                    self.LOGGER.warning(f"Login failed on attempt {retries + 1}")
+                self.LOGGER.warning(f"Login failed on attempt {retries + 1}")
             except LoginError:
-                retries += 1
-                time.sleep(1)
+                pass
+            retries += 1
+            time.sleep(next(delays))
 
         self.LOGGER.error("Max retries reached. Login failed.")
         raise LoginError("Exceeded maximum login attempts")
 
+    def wait_for_login_outcome(self, timeout=10):
+        """Waits until the login either shows an error or the login link disappears."""
+        def outcome():
+            if any(element.is_displayed() for element in self.browser.find_elements(By.CSS_SELECTOR, "p.err")):
+                return 'error'
+            if not any(element.is_displayed() for element in self.browser.find_elements(By.ID, "user-login")):
+                return 'success'
+            return None
+
+        try:
+            return waits.wait_until(outcome, timeout, name="login outcome")
+        except waits.WaitTimeout:
+            return None
+
     def get_lyrics(self, song_name):
-        """Navigates to the Lyrics.com search page and retrieves lyrics for a specified song."""
+        """Navigates to the Lyrics.com search page and retrieves lyrics for a specified song.
+
+        Returns the path of the saved lyrics file, or None when nothing was saved.
+        """
         try:
             # song_name = self.assets.get_asset("song_name")['value']
             # song_name = self.args.get_in_arg("song_name")['value']
             
-            self.enter_text_in_element(By.CSS_SELECTOR, 'input#search.ui-autocomplete-input', song_name)
-            search_button = self.wait_for_element(By.CSS_SELECTOR, 'button#page-word-search-button')
-            if search_button:
-                search_button.click()
-            time.sleep(2)
-
-            song_list = self.get_song_list()
+            with span("search", backend='browser'):
+                self.enter_text_in_element(By.CSS_SELECTOR, 'input#search.ui-autocomplete-input', song_name)
+                search_button = self.wait_for_element(By.CSS_SELECTOR, 'button#page-word-search-button')
+                if search_button:
+                    search_button.click()
+                song_list = self.get_song_list()
             if not song_list:
                 self.LOGGER.warning("No songs found.")
                 return
 
             song_selected = song_list[0]
-            if song_selected:
-                self.browser.get(song_selected['url'])
-
-            lyrics = self.get_lyrics_from_song()
+            with span("lyric fetch", backend='browser'):
+                if song_selected:
+                    self.browser.get(song_selected['url'])
+                lyrics = self.get_lyrics_from_song()
+            record_selenium_page(self.browser, self.block_stats)
             if lyrics:
-                translated_lyrics = self.translate_lyrics(lyrics)
-                self.save_lyrics_to_file(translated_lyrics, song_selected.get('title', song_name))
+                return self.translate_and_save(song_name, song_selected, lyrics)
             else:
                 self.LOGGER.warning("Lyrics not found.")
         except Exception as e:
             self.LOGGER.error(f"Error retrieving lyrics: {e}")
+        return None
+
+    def get_lyrics_via_http(self, song_name):
+        """Searches and fetches lyrics over HTTP without a browser.
+
+        Returns the path of the saved lyrics file, or None when the browser is needed instead.
+        """
+        try:
+            with span("search", backend='http'):
+                song_list = self.http.search(song_name)
+            if not song_list:
+                self.LOGGER.info(f"No songs found over HTTP for '{song_name}'.")
+                return None
+            song_selected = song_list[0]
+            with span("lyric fetch", backend='http'):
+                lyrics = self.http.fetch_lyrics(song_selected['url'])
+        except (requests.RequestException, LyricsUnavailable) as e:
+            self.LOGGER.info(f"HTTP lookup failed, falling back to the browser: {e}")
+            return None
+        return self.translate_and_save(song_name, song_selected, lyrics)
+
+    def get_lyrics_from_store(self, song_name):
+        """Saves the stored translation of an earlier lookup of the same query.
+
+        Returns the path of the saved lyrics file, or None when the store has no fresh entry.
+        """
+        try:
+            with span("store lookup"):
+                stored = self.store.get(song_name, target='vi')
+        except Exception as e:
+            self.LOGGER.error(f"Error reading the lyrics store: {e}")
+            return None
+        if not stored:
+            return None
+        self.LOGGER.info(f"'{song_name}' found in the lyrics store: {stored['title']} ({stored['url']})")
+        return self.save_lyrics_to_file(stored['translation'] or stored['lyrics'], stored['title'] or song_name)
+
+    def translate_and_save(self, song_name, song_selected, lyrics):
+        """Translates the lyrics of the selected song, keeps both in the store and saves the translation."""
+        translated_lyrics = self.translate_lyrics(lyrics)
+        try:
+            self.store.put(song_name, song_selected, lyrics, translated_lyrics, target='vi')
+        except Exception as e:
+            self.LOGGER.error(f"Error writing the lyrics store: {e}")
+        return self.save_lyrics_to_file(translated_lyrics, song_selected.get('title') or song_name)
 
     def get_song_list(self):
-        """Retrieves the list of songs from the search results."""
-        try:
-            song_list = []
-            song_elements = self.wait_for_element(By.CSS_SELECTOR, ".best-matches .bm-case")
-            if song_elements:
-                song_elements = self.browser.find_elements(By.CSS_SELECTOR, ".best-matches .bm-case")
-                for song in song_elements:
-                    song_title_element = song.find_element(By.CSS_SELECTOR, ".bm-label a")
-                    song_url = song_title_element.get_attribute("href")
-                    album_elements = song.find_elements(By.CSS_SELECTOR, ".bm-label b a")
-                    artist_element = song.find_elements(By.CSS_SELECTOR, ".bm-label a")[-1]
-                    song_list.append({
-                        "title": song_title_element.text.strip(),
-                        "url": song_url,
-                        "image_url": song.find_element(By.CSS_SELECTOR, ".album-thumb img").get_attribute("src"),
-                        "album_title": album_elements[1].text if len(album_elements) > 1 else "No album",
-                        "artist_name": artist_element.text.strip(),
-                    })
-            return song_list
+        """Retrieves the list of songs from the search results in a single browser call."""
+        try:
+            if not self.wait_for_element(By.CSS_SELECTOR, SONG_RESULT_SELECTOR):
+                return []
+            return extract_records(self.browser, SONG_RESULT_SELECTOR, SONG_FIELDS)
         except Exception as e:
             self.LOGGER.error(f"Error retrieving song list: {e}")
             return []
@@ -186,40 +263,180 @@ class GetLyrics:
         return None
 
     def translate_lyrics(self, lyrics):
-        """Translates lyrics to Vietnamese."""
+        """Translates lyrics to Vietnamese, only sending lines that are not in the translation cache."""
         try:
-            return GoogleTranslator(source='auto', target='vi').translate(lyrics)
+            with span("translate"):
+                return self.translations.translate(lyrics, source='auto', target='vi')
         except Exception as e:
             self.LOGGER.error(f"Error translating lyrics: {e}")
             return lyrics
 
     def save_lyrics_to_file(self, lyrics_text, song_title):
-        """Saves lyrics to a file with the specified title."""
-        file_path = os.path.join(os.getcwd(), f'output/{song_title}.txt')
+        """Saves lyrics to a file with the specified title and returns its path."""
+        file_path = os.path.join(os.getcwd(), 'output', f'{sanitize_title(song_title)}.txt')
         try:
-            with open(file_path, 'w', encoding='utf-8') as file:
-                file.write(lyrics_text)
-            self.args.set_out_arg("trans_song", file_path)
+            with span("save"):
+                with open(file_path, 'w', encoding='utf-8') as file:
+                    file.write(lyrics_text)
+                self.args.set_out_arg("trans_song", file_path)
             self.LOGGER.info(f"Lyrics saved to {file_path}")
+            return file_path
         except Exception as e:
             self.LOGGER.error(f"Error saving lyrics to file: {e}")
+            return None
 
-    def run_task(self):
+    def session_alive(self):
+        """Checks whether the browser is still open and responding."""
+        if not self.browser:
+            return False
         try:
+            self.browser.current_url
+            return True
+        except WebDriverException:
+            return False
+
+    def needs_login(self):
+        """Checks, without waiting, whether the login link is shown on the current page."""
+        return any(element.is_displayed() for element in self.browser.find_elements(By.ID, "user-login"))
+
+    def ensure_session(self):
+        """Reopens the browser if it died, returns to the search page and logs in again if the session expired."""
+        if self.session_alive():
+            self.browser.get(LYRICS_URL)
+        else:
+            if self.browser:
+                try:
+                    release_chrome(self.browser, self.attached)
+                except WebDriverException:
+                    pass
+            self.LOGGER.info("Opening a new browser session.")
             self.browser = self.get_browser()
-            if self.check_login():
-                self.attempt_login(self.username, self.password)
+        if self.needs_login():
+            self.attempt_login(self.username, self.password)
+        if not self.startup_reported:
+            self.startup_reported = True
+            source = "warm browser" if self.attached else "new browser"
+            self.LOGGER.info(f"Startup to first action: {time.perf_counter() - self.started:.2f}s ({source})")
+
+    def lookup_song(self, song_name):
+        """Retrieves lyrics for one song of a batch and returns its status and latency."""
+        start = time.perf_counter()
+        record = {'song_name': song_name, 'status': 'error', 'file': None, 'error': None, 'backend': 'store'}
+        try:
+            file_path = self.get_lyrics_from_store(song_name)
+            if file_path is None and self.backend != 'browser':
+                record['backend'] = 'http'
+                file_path = self.get_lyrics_via_http(song_name)
+            if file_path is None and self.backend != 'http':
+                record['backend'] = 'browser'
+                self.ensure_session()
+                file_path = self.get_lyrics(song_name)
+                if file_path is None and not self.session_alive():
+                    # The browser died during the lookup, retry once in a fresh session
+                    self.ensure_session()
+                    file_path = self.get_lyrics(song_name)
+            record['status'] = 'ok' if file_path else 'not_found'
+            record['file'] = file_path
+        except Exception as e:
+            self.LOGGER.error(f"Error looking up '{song_name}': {e}")
+            record['error'] = str(e)
+        record['seconds'] = round(time.perf_counter() - start, 3)
+        self.LOGGER.info(f"{song_name}: {record['status']} in {record['seconds']}s")
+        return record
+
+    def run_batch(self, songs):
+        """Retrieves lyrics for several songs in one browser session and saves a per-song report."""
+        start = self.started = time.perf_counter()
+        results = []
+        try:
+            for song_name in songs:
+                results.append(self.lookup_song(song_name))
+        finally:
+            self.save_batch_report(results, time.perf_counter() - start)
+            self.close()
+        return results
+
+    def save_batch_report(self, results, elapsed):
+        """Writes the per-song status and latency report and sets it as the trans_song output."""
+        report = {
+            'songs': results,
+            'total': len(results),
+            'ok': sum(1 for result in results if result['status'] == 'ok'),
+            'seconds': round(elapsed, 3),
+        }
+        os.makedirs(os.path.dirname(BATCH_REPORT_PATH), exist_ok=True)
+        with open(BATCH_REPORT_PATH, 'w', encoding='utf-8') as file:
+            json.dump(report, file, ensure_ascii=False, indent=2)
+        self.args.set_out_arg("trans_song", os.path.abspath(BATCH_REPORT_PATH))
+        self.LOGGER.info(f"Batch report saved to {BATCH_REPORT_PATH}: {report['ok']}/{report['total']} songs")
+
+    def run_task(self):
+        self.started = time.perf_counter()
+        try:
+            if self.get_lyrics_from_store(self.song_name):
+                return
+            if self.backend != 'browser' and self.get_lyrics_via_http(self.song_name):
+                return
+            if self.backend == 'http':
+                self.LOGGER.warning("Lyrics not found over HTTP and the browser fallback is disabled.")
+                return
+            # Opens or attaches to the browser and logs in only when the saved session is not valid
+            self.ensure_session()
             self.get_lyrics(self.song_name)
         except Exception as e:
             self.LOGGER.error(f"Error when running task: {e}")
         finally:
-            if self.browser:
-                self.browser.quit()
+            self.close()
+
+    def close(self):
+        """Releases the browser, writes the pending outputs and logs the run statistics."""
+        if self.browser:
+            release_chrome(self.browser, self.attached)
+            self.browser = None
+        self.http.close()
+        self.args.flush()
+        if self.block_stats.loaded:
+            self.LOGGER.info(self.block_stats.format())
+        self.LOGGER.debug(f"Wait times:\n{waits.format_wait_summary()}")
+        self.LOGGER.info(f"Step timings:\n{timing.report()}")
+        self.LOGGER.debug(f"Translation cache: {self.translations.stats()}")
+        self.LOGGER.debug(f"Lyrics store: {self.store.stats()}")
+        self.store.close()
+
+# DOP arguments and assets shared by GetLyrics and the Get In Args keyword, created on first use
+arguments = None
+assets = None
+
+def get_arguments():
+    """Returns the cached process arguments of this run."""
+    global arguments
+    if arguments is None:
+        arguments = cached_arguments()
+    return arguments
+
+def get_assets():
+    """Returns the cached assets of this run."""
+    global assets
+    if assets is None:
+        assets = cached_assets()
+    return assets
+
+def get_in_args(*names):
+    """Returns the values of several input arguments, fetched from DOP in one batch."""
+    args = get_arguments()
+    args.prefetch(names)
+    return args.get_values(*names)
 
 @task
 def run_main(username, password, song_name):
     main = GetLyrics(username, password, song_name)
     main.run_task()
 
+@task
+def run_batch(username, password, data_json):
+    """Retrieves lyrics for every song listed in the data_json file in one logged-in session."""
+    main = GetLyrics(username, password, None)
+    return main.run_batch([song for song in load_songs(data_json) if song])
+
 if __name__ == '__main__':
     run_main()
\ No newline at end of file
@@ -0,0 +1,86 @@
+import os
+
+import pytest
+
+from checkpoint import Journal
+
+
+def test_journal_keeps_recorded_keys(tmp_path):
+    path = str(tmp_path / 'orders.journal')
+    with Journal(path) as journal:
+        journal.record(1)
+        journal.record('2')
+
+    journal = Journal(path)
+    assert 1 in journal and '2' in journal
+    assert '3' not in journal
+    journal.close()
+
+
+def test_journal_drops_torn_last_line(tmp_path):
+    path = tmp_path / 'orders.journal'
+    path.write_text("1\n2\n1", encoding='utf-8')
+
+    with Journal(str(path)) as journal:
+        # The torn line may be the start of "10"; the complete "1" above is what marks order 1 done
+        assert '1' in journal and '2' in journal
+        journal.record('10')
+
+    assert path.read_text(encoding='utf-8') == "1\n2\n10\n"
+    with Journal(str(path)) as journal:
+        assert '10' in journal
+
+
+def test_journal_does_not_trust_a_torn_only_line(tmp_path):
+    path = tmp_path / 'orders.journal'
+    path.write_text("4", encoding='utf-8')
+
+    with Journal(str(path)) as journal:
+        assert '4' not in journal
+        journal.record('42')
+
+    with Journal(str(path)) as journal:
+        assert '42' in journal
+        assert '4' not in journal
+
+
+def test_order_is_done_only_with_journal_entry_and_pdf(tmp_path, monkeypatch):
+    order_robots = pytest.importorskip('order_robots')
+    monkeypatch.setattr(order_robots, 'journal', Journal(str(tmp_path / 'orders.journal')))
+    monkeypatch.setattr(order_robots, 'PDF_FOLDER', str(tmp_path))
+
+    order_robots.get_journal().record('1')
+    order_robots.get_journal().record('2')
+    (tmp_path / '1.pdf').write_bytes(b'%PDF')
+
+    assert order_robots.is_order_done('1')
+    assert not order_robots.is_order_done('2')
+    assert not order_robots.is_order_done('3')
+    order_robots.get_journal().close()
+
+
+def test_form_rows_are_skipped_once_journaled_with_screenshot(tmp_path, monkeypatch):
+    input_form = pytest.importorskip('input_form')
+    rows = [{'First Name': 'Ann'}, {'First Name': 'Bob'}, {'First Name': 'Cy'}]
+    filled = []
+
+    def fill_form(page, row):
+        filled.append(row['First Name'])
+        path = input_form.screenshot_path_for(row)
+        open(path, 'wb').close()
+        return path
+
+    monkeypatch.chdir(tmp_path)
+    os.makedirs('images')
+    monkeypatch.setattr(input_form, 'JOURNAL_PATH', str(tmp_path / 'input_form.journal'))
+    monkeypatch.setattr(input_form, 'iter_xlsx_rows', lambda file_path, sheet: iter(rows))
+    monkeypatch.setattr(input_form, 'fill_form', fill_form)
+
+    input_form.fill_form_with_excel_data(None)
+    assert filled == ['Ann', 'Bob', 'Cy']
+
+    # A journaled row whose screenshot is gone is filled again
+    os.remove(input_form.screenshot_path_for(rows[1]))
+    filled.clear()
+    input_form.fill_form_with_excel_data(None)
+    assert filled == ['Bob']
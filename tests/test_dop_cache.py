@@ -0,0 +1,48 @@
+import json
+
+from dop_cache import CachedArguments, FileArguments
+
+
+def make_arguments(tmp_path):
+    args_path = tmp_path / 'args.json'
+    args_path.write_text(json.dumps({
+        'username': {'name': 'username', 'value': 'robot'},
+        'song_name': {'name': 'song_name', 'value': 'Hello'},
+    }), encoding='utf-8')
+    return FileArguments(str(args_path), str(tmp_path / 'out_args.json'))
+
+
+def test_prefetch_reads_every_argument_once(tmp_path):
+    source = make_arguments(tmp_path)
+    arguments = CachedArguments(source)
+
+    arguments.prefetch(['username', 'song_name'])
+    assert arguments.get_values('username', 'song_name') == {'username': 'robot', 'song_name': 'Hello'}
+    assert arguments.get_in_arg('username')['value'] == 'robot'
+    assert source.reads == 1
+    assert arguments.stats()['hits'] == 3
+
+
+def test_expired_arguments_are_read_again(tmp_path):
+    now = [0.0]
+    source = make_arguments(tmp_path)
+    arguments = CachedArguments(source, ttl=10, clock=lambda: now[0])
+
+    arguments.get_in_arg('song_name')
+    now[0] = 11.0
+    arguments.get_in_arg('song_name')
+    assert source.reads == 2
+
+
+def test_outputs_are_written_on_flush(tmp_path):
+    source = make_arguments(tmp_path)
+    out_path = tmp_path / 'out_args.json'
+
+    with CachedArguments(source) as arguments:
+        arguments.set_out_arg('trans_song', 'first.txt')
+        arguments.set_out_arg('trans_song', 'second.txt')
+        assert not out_path.exists()
+        assert arguments.stats()['pending'] == 1
+
+    assert source.writes == 1
+    assert json.loads(out_path.read_text(encoding='utf-8')) == {'trans_song': 'second.txt'}
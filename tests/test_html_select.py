@@ -0,0 +1,54 @@
+from html_select import extract_records, parse_html, select
+
+PAGE = """
+<div id="results" class="list">
+  <div class="row"><a class="title" href="/a">A</a><span>one</span></div>
+  <div class="row ad"><p><a class="title" href="/b">B</a></p></div>
+  <section><a class="title">C</a></section>
+</div>
+<a class="title" href="/d">D</a>
+"""
+
+
+def texts(elements):
+    return [element.text() for element in elements]
+
+
+def test_descendant_combinator_matches_at_any_depth():
+    root = parse_html(PAGE)
+
+    assert texts(select(root, '#results a.title')) == ['A', 'B', 'C']
+    assert texts(select(root, '.row a')) == ['A', 'B']
+    assert texts(select(root, 'div.ad p a[href]')) == ['B']
+    assert texts(select(root, 'a.title')) == ['A', 'B', 'C', 'D']
+
+
+def test_compounds_must_match_in_order():
+    root = parse_html(PAGE)
+
+    assert select(root, 'a .row') == []
+    assert select(root, 'section .row a') == []
+    assert texts(select(root, 'div div a')) == ['A', 'B']
+
+
+def test_ancestors_above_the_scope_match_like_query_selector_all():
+    # element.querySelectorAll('.list a') finds the links in a row even though .list is outside the row
+    row = select(parse_html(PAGE), '.ad')[0]
+
+    assert texts(select(row, '.list a')) == ['B']
+    assert texts(select(row, '.ad a')) == ['B']
+    # The scope itself is never returned, only elements under it
+    assert select(row, '.ad') == []
+
+
+def test_extract_records_reads_fields_of_each_container():
+    records = extract_records(parse_html(PAGE), '#results .row', {
+        'title': ('a.title', 'text', 0, None),
+        'url': ('a.title', 'href', 0, None),
+        'extra': ('span', 'text', 0, ''),
+    }, base_url='https://example.com/search')
+
+    assert records == [
+        {'title': 'A', 'url': 'https://example.com/a', 'extra': 'one'},
+        {'title': 'B', 'url': 'https://example.com/b', 'extra': ''},
+    ]
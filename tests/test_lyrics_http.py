@@ -0,0 +1,45 @@
+import pytest
+
+from benchmarks.standins import start_standins
+from lyrics_http import LyricsHttpClient
+
+
+@pytest.fixture(scope='module')
+def lyrics_url():
+    server = start_standins(seed=1)
+    yield server.urls()['LYRICS_URL']
+    server.stop()
+
+
+def test_search_parses_the_best_matches(lyrics_url):
+    client = LyricsHttpClient(lyrics_url)
+    songs = client.search("hello world")
+    client.close()
+
+    assert [song['title'] for song in songs] == ['Hello World', 'Hello World (Live)', 'Hello World (Remix)']
+    assert songs[0]['url'].startswith(lyrics_url + 'lyric/')
+    assert songs[0]['album_title'].startswith('Album ')
+    assert songs[0]['artist_name'].startswith('Artist ')
+
+
+def test_fetch_lyrics_returns_the_lyric_text(lyrics_url):
+    client = LyricsHttpClient(lyrics_url)
+    song = client.search("hello world")[0]
+    lyrics = client.fetch_lyrics(song['url'])
+    client.close()
+
+    assert len(lyrics.splitlines()) == 24
+    assert lyrics == lyrics.strip()
+
+
+def test_search_without_results(lyrics_url):
+    client = LyricsHttpClient(lyrics_url)
+    assert client.search("") == []
+    client.close()
+
+
+def test_requests_use_the_browser_user_agent(lyrics_url):
+    client = LyricsHttpClient(lyrics_url)
+    response = client.session.get(lyrics_url)
+    client.close()
+    assert not response.request.headers['User-Agent'].startswith('python-requests')
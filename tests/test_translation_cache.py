@@ -0,0 +1,35 @@
+from translation_cache import StubTranslator, TranslationCache
+
+
+class CountingTranslator(StubTranslator):
+    def __init__(self):
+        self.calls = []
+
+    def translate_lines(self, lines, source, target):
+        self.calls.append(list(lines))
+        return super().translate_lines(lines, source, target)
+
+
+def test_only_uncached_lines_are_translated(tmp_path):
+    translator = CountingTranslator()
+    cache = TranslationCache(str(tmp_path / 'translations.sqlite3'), translator)
+
+    assert cache.translate("Hello\n\nWorld\nHello", target='vi') == "[vi] Hello\n\n[vi] World\n[vi] Hello"
+    assert translator.calls == [['Hello', 'World']]
+    assert cache.stats()['misses'] == 2
+
+    assert cache.translate("World  \nAgain", target='vi') == "[vi] World\n[vi] Again"
+    assert translator.calls[-1] == ['Again']
+    assert cache.stats()['hits'] == 1
+    cache.close()
+
+
+def test_translations_persist_between_caches(tmp_path):
+    path = str(tmp_path / 'translations.sqlite3')
+    TranslationCache(path, StubTranslator()).translate("Hello", target='vi')
+
+    translator = CountingTranslator()
+    cache = TranslationCache(path, translator)
+    assert cache.translate("Hello", target='vi') == "[vi] Hello"
+    assert translator.calls == []
+    assert cache.stats()['hit_rate'] == 1.0
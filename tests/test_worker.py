@@ -0,0 +1,108 @@
+import json
+import threading
+
+import pytest
+
+import timing
+from worker import Worker, read_jobs
+
+
+@pytest.fixture(autouse=True)
+def spans_folder(tmp_path, monkeypatch):
+    """Keeps the spans of the test jobs out of the repository's output folder."""
+    monkeypatch.setattr(timing, 'SPANS_FOLDER', str(tmp_path / 'spans'))
+    monkeypatch.setattr(timing, '_file', None)
+    yield
+    if timing._file is not None:
+        timing._file.close()
+
+
+class EchoHandler:
+    name = 'echo'
+
+    def __init__(self):
+        self.seen = []
+        self.closed = False
+
+    def run(self, args):
+        self.seen.append(args['text'])
+        return 'ok', args['text']
+
+    def close(self):
+        self.closed = True
+
+
+def make_worker(tmp_path, handler):
+    return Worker([handler], max_in_flight=2, prefetch=2,
+                  results_path=str(tmp_path / 'results.jsonl'), journal_path=str(tmp_path / 'worker.journal'))
+
+
+def read_results(tmp_path):
+    with open(tmp_path / 'results.jsonl', encoding='utf-8') as file:
+        return [json.loads(line) for line in file]
+
+
+def test_read_jobs_numbers_lines_and_skips_blank_ones(tmp_path):
+    path = tmp_path / 'jobs.jsonl'
+    path.write_text('{"a": 1}\n\n{"b": 2}', encoding='utf-8')
+
+    assert list(read_jobs(str(path))) == [(1, '{"a": 1}\n'), (3, '{"b": 2}')]
+
+
+def test_read_jobs_waits_for_the_rest_of_a_partial_line(tmp_path):
+    path = tmp_path / 'jobs.jsonl'
+    path.write_text('{"task": "ec', encoding='utf-8')
+    stop = threading.Event()
+    jobs = read_jobs(str(path), follow=True, poll_interval=0.01, stop=stop)
+
+    def finish_line():
+        with open(path, 'a', encoding='utf-8') as file:
+            file.write('ho"}\n')
+
+    timer = threading.Timer(0.1, finish_line)
+    timer.start()
+    assert next(jobs) == (1, '{"task": "echo"}\n')
+    stop.set()
+    assert list(jobs) == []
+    timer.join()
+
+
+def test_malformed_lines_fail_only_their_own_job(tmp_path):
+    path = tmp_path / 'jobs.jsonl'
+    path.write_text("\n".join([
+        'not json',
+        '["a list"]',
+        '{"request_id": "no-task", "args": {}}',
+        '{"request_id": "bad-args", "task": "echo", "args": [1]}',
+        '{"request_id": "unknown", "task": "missing"}',
+        '{"request_id": "good", "task": "echo", "args": {"text": "hi"}}',
+    ]) + "\n", encoding='utf-8')
+    handler = EchoHandler()
+
+    make_worker(tmp_path, handler).run(str(path))
+
+    results = read_results(tmp_path)
+    assert [result['status'] for result in results] == ['error'] * 5 + ['ok']
+    assert [result['line'] for result in results[:5]] == [1, 2, 3, 4, 5]
+    assert results[-1]['request_id'] == 'good' and results[-1]['result'] == 'hi'
+    assert list(results[-1]['steps']) == ['job']
+    assert handler.seen == ['hi'] and handler.closed
+
+
+def test_completed_jobs_are_skipped_on_restart(tmp_path):
+    path = tmp_path / 'jobs.jsonl'
+    path.write_text(
+        '{"request_id": "job-1", "task": "echo", "args": {"text": "one"}}\n'
+        '{"request_id": "job-2", "task": "echo", "args": {"text": "two"}}\n',
+        encoding='utf-8',
+    )
+    make_worker(tmp_path, EchoHandler()).run(str(path))
+
+    with open(path, 'a', encoding='utf-8') as file:
+        file.write('{"request_id": "job-3", "task": "echo", "args": {"text": "three"}}\n')
+    handler = EchoHandler()
+    worker = make_worker(tmp_path, handler)
+    worker.run(str(path))
+
+    assert handler.seen == ['three']
+    assert worker.counts == {'ok': 1, 'error': 0, 'skipped': 2}
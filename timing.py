@@ -0,0 +1,158 @@
+import json
+import math
+import os
+import threading
+import time
+import uuid
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+SPANS_FOLDER = os.path.join('output', 'spans')
+
+# Shared with worker processes through the environment so their spans count towards the same run
+RUN_ID = os.environ.setdefault("SPAN_RUN_ID", uuid.uuid4().hex)
+
+# The run id the spans of the current thread are tagged with; the queue worker gives every job its own
+_current_run = ContextVar('span_run', default=RUN_ID)
+
+_lock = threading.Lock()
+_file = None
+
+
+def spans_path(run_id=RUN_ID):
+    """Returns the span log of a run, one file per run so reports never scan other runs."""
+    return os.path.join(SPANS_FOLDER, f"{run_id}.jsonl")
+
+
+@contextmanager
+def run(run_id):
+    """Tags the spans of the wrapped block, in this thread, with their own run id.
+
+    They are still written to the span log of the process run, so a long-running worker keeps
+    one file however many jobs it runs.
+    """
+    token = _current_run.set(run_id)
+    try:
+        yield run_id
+    finally:
+        _current_run.reset(token)
+
+
+def record(name, seconds, **attrs):
+    """Appends one finished span, tagged with the current run, to the span log of the process run."""
+    global _file
+    entry = {
+        'run': _current_run.get(),
+        'name': name,
+        'seconds': round(seconds, 6),
+        'end': round(time.time(), 3),
+        'pid': os.getpid(),
+    }
+    if attrs:
+        entry['attrs'] = attrs
+    with _lock:
+        if _file is None:
+            os.makedirs(SPANS_FOLDER, exist_ok=True)
+            _file = open(spans_path(), 'a', encoding='utf-8')
+        _file.write(json.dumps(entry, default=str) + "\n")
+        _file.flush()
+
+
+@contextmanager
+def span(name, **attrs):
+    """Times the wrapped block and records it as a span, also when it raises."""
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception as e:
+        attrs['error'] = type(e).__name__
+        raise
+    finally:
+        record(name, time.perf_counter() - start, **attrs)
+
+
+def load_durations(run_id=None):
+    """Returns the span durations of one run, from every process that took part, grouped by name.
+
+    Reads the span log of the process run and keeps the spans tagged with ``run_id``, by default
+    the current run.
+    """
+    run_id = run_id or _current_run.get()
+    path = spans_path()
+    durations = defaultdict(list)
+    if not os.path.exists(path):
+        return durations
+    with open(path, 'r', encoding='utf-8') as file:
+        for line in file:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue
+            if entry.get('run') == run_id:
+                durations[entry['name']].append(entry['seconds'])
+    return durations
+
+
+def percentile(values, fraction):
+    """Returns the nearest-rank percentile of a sorted list."""
+    return values[max(0, math.ceil(fraction * len(values)) - 1)]
+
+
+def summary(run_id=None):
+    """Returns count, total and p50/p95/p99 seconds for each span name of a run, by default the current one."""
+    result = {}
+    for name, values in load_durations(run_id).items():
+        values = sorted(values)
+        result[name] = {
+            'count': len(values),
+            'total': sum(values),
+            'p50': percentile(values, 0.50),
+            'p95': percentile(values, 0.95),
+            'p99': percentile(values, 0.99),
+        }
+    return result
+
+
+def format_summary(stats):
+    """Returns a span summary as a printable table."""
+    lines = [f"{'Step':<24} {'Count':>6} {'Total s':>9} {'p50 s':>8} {'p95 s':>8} {'p99 s':>8}"]
+    for name, values in sorted(stats.items()):
+        lines.append(
+            f"{name:<24} {values['count']:>6} {values['total']:>9.2f} "
+            f"{values['p50']:>8.3f} {values['p95']:>8.3f} {values['p99']:>8.3f}"
+        )
+    return "\n".join(lines)
+
+
+def export_prometheus(stats, path):
+    """Writes a span summary in the Prometheus textfile collector format."""
+    lines = [
+        "# HELP robot_step_seconds Duration of task steps.",
+        "# TYPE robot_step_seconds summary",
+    ]
+    for name, values in sorted(stats.items()):
+        label = name.replace('\\', '\\\\').replace('"', '\\"')
+        for quantile in ('0.5', '0.95', '0.99'):
+            key = 'p' + quantile[2:].ljust(2, '0')
+            lines.append(f'robot_step_seconds{{step="{label}",quantile="{quantile}"}} {values[key]}')
+        lines.append(f'robot_step_seconds_sum{{step="{label}"}} {values["total"]}')
+        lines.append(f'robot_step_seconds_count{{step="{label}"}} {values["count"]}')
+
+    folder = os.path.dirname(path)
+    if folder:
+        os.makedirs(folder, exist_ok=True)
+    # Write then rename, so the collector never reads a half-written file
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as file:
+        file.write("\n".join(lines) + "\n")
+    os.replace(tmp_path, path)
+
+
+def report(run_id=None):
+    """Returns the step summary of a run as a table, exporting it when SPANS_PROMETHEUS_FILE is set."""
+    stats = summary(run_id)
+    prometheus_path = os.environ.get("SPANS_PROMETHEUS_FILE")
+    if prometheus_path:
+        export_prometheus(stats, prometheus_path)
+    return format_summary(stats)
@@ -0,0 +1,152 @@
+import os
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+
+from cache_stats import hit_stats
+
+TRANSLATION_DB_PATH = os.path.join('output', 'translations.sqlite3')
+
+# Google Translate rejects texts over 5000 characters
+MAX_CHUNK_CHARS = 4500
+
+
+class Translator(ABC):
+    """Interface of the translation backends used by TranslationCache."""
+
+    @abstractmethod
+    def translate_lines(self, lines, source, target):
+        """Translates each line and returns the translations in the same order."""
+
+
+class GoogleLineTranslator(Translator):
+    """Translates lines with deep_translator's GoogleTranslator, one request per chunk of lines."""
+
+    def translate_lines(self, lines, source, target):
+        from deep_translator import GoogleTranslator
+
+        translator = GoogleTranslator(source=source, target=target)
+        translated = (translator.translate("\n".join(lines)) or "").split("\n")
+        if len(translated) != len(lines):
+            # The service merged or split lines, so the chunk cannot be mapped back; go line by line
+            translated = [translator.translate(line) or line for line in lines]
+        return [line.strip() for line in translated]
+
+
+class StubTranslator(Translator):
+    """Offline translator that returns every line with a target language prefix."""
+
+    def translate_lines(self, lines, source, target):
+        return [f"[{target}] {line}" for line in lines]
+
+
+TRANSLATORS = {
+    'google': GoogleLineTranslator,
+    'stub': StubTranslator,
+}
+
+
+def get_translator(name=None):
+    """Returns the translator selected by name or by the LYRICS_TRANSLATOR environment variable."""
+    name = name or os.environ.get("LYRICS_TRANSLATOR", "google")
+    try:
+        return TRANSLATORS[name]()
+    except KeyError:
+        raise ValueError(f"Unknown translator '{name}', expected one of {', '.join(TRANSLATORS)}")
+
+
+def normalize_line(line):
+    """Collapses whitespace so lines differing only in spacing share a cache entry."""
+    return " ".join(line.split())
+
+
+class TranslationCache:
+    """SQLite-backed translation cache keyed by (normalized line, source language, target language).
+
+    Only lines missing from the cache are sent to the translator, in chunks of at most
+    ``max_chunk_chars`` characters.
+    """
+
+    def __init__(self, path=TRANSLATION_DB_PATH, translator=None, max_chunk_chars=MAX_CHUNK_CHARS):
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        self.translator = translator or get_translator()
+        self.max_chunk_chars = max_chunk_chars
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS translations ("
+            " line TEXT NOT NULL, source TEXT NOT NULL, target TEXT NOT NULL, translation TEXT NOT NULL,"
+            " PRIMARY KEY (line, source, target))"
+        )
+        self.connection.commit()
+
+    def translate(self, text, source='auto', target='vi'):
+        """Translates a multi-line text, reusing cached translations of repeated or known lines."""
+        lines = text.split("\n")
+        keys = list(dict.fromkeys(normalize_line(line) for line in lines if line.strip()))
+
+        translations = self.lookup(keys, source, target)
+        missing = [key for key in keys if key not in translations]
+        self.hits += len(keys) - len(missing)
+        self.misses += len(missing)
+
+        for chunk in self.chunks(missing):
+            translated = self.translator.translate_lines(chunk, source, target)
+            if len(translated) != len(chunk):
+                raise ValueError(
+                    f"{type(self.translator).__name__} returned {len(translated)} translations for {len(chunk)} lines"
+                )
+            new_entries = dict(zip(chunk, translated))
+            self.store(new_entries, source, target)
+            translations.update(new_entries)
+
+        return "\n".join(translations[normalize_line(line)] if line.strip() else line for line in lines)
+
+    def lookup(self, keys, source, target):
+        """Returns the cached translations of the given normalized lines."""
+        found = {}
+        with self.lock:
+            # Stay well below SQLite's limit on the number of query parameters
+            for start in range(0, len(keys), 500):
+                batch = keys[start:start + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows = self.connection.execute(
+                    f"SELECT line, translation FROM translations"
+                    f" WHERE source = ? AND target = ? AND line IN ({placeholders})",
+                    [source, target, *batch],
+                )
+                found.update(rows)
+        return found
+
+    def store(self, translations, source, target):
+        """Saves new translations of normalized lines."""
+        with self.lock:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO translations (line, source, target, translation) VALUES (?, ?, ?, ?)",
+                [(line, source, target, translation) for line, translation in translations.items()],
+            )
+            self.connection.commit()
+
+    def chunks(self, lines):
+        """Splits lines into groups whose joined length stays within ``max_chunk_chars``."""
+        chunk, size = [], 0
+        for line in lines:
+            if chunk and size + len(line) + 1 > self.max_chunk_chars:
+                yield chunk
+                chunk, size = [], 0
+            chunk.append(line)
+            size += len(line) + 1
+        if chunk:
+            yield chunk
+
+    def stats(self):
+        """Returns the line-level hit and miss counters."""
+        return hit_stats(self.hits, self.misses)
+
+    def close(self):
+        """Closes the database connection."""
+        self.connection.close()
@@ -0,0 +1,76 @@
+import random
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+# Poll interval for conditions that have no native wait in the browser library
+POLL_INTERVAL = 0.05
+
+# Durations of every recorded wait, grouped by wait name
+wait_times = defaultdict(list)
+
+
+class WaitTimeout(Exception):
+    """Raised when a wait condition is not met within its timeout."""
+    pass
+
+
+def record_wait(name, seconds):
+    """Records how long a named wait took."""
+    wait_times[name].append(seconds)
+
+
+@contextmanager
+def timed(name):
+    """Records the duration of the wrapped block, for waits done natively by the browser library."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_wait(name, time.perf_counter() - start)
+
+
+def wait_until(condition, timeout=10, name='condition', poll=POLL_INTERVAL):
+    """Polls ``condition`` until it returns a truthy value and returns that value.
+
+    Raises WaitTimeout when the condition is still false after ``timeout`` seconds.
+    """
+    start = time.perf_counter()
+    deadline = start + timeout
+    while True:
+        result = condition()
+        if result:
+            record_wait(name, time.perf_counter() - start)
+            return result
+        if time.perf_counter() >= deadline:
+            record_wait(name, time.perf_counter() - start)
+            raise WaitTimeout(f"Timed out after {timeout}s waiting for {name}")
+        time.sleep(poll)
+
+
+def backoff_delays(retries, base=0.25, factor=2.0, max_delay=5.0, jitter=0.5):
+    """Yields ``retries`` exponentially growing delays, each randomised by +/- ``jitter``."""
+    for attempt in range(retries):
+        delay = min(max_delay, base * factor ** attempt)
+        yield delay * random.uniform(1 - jitter, 1 + jitter)
+
+
+def wait_summary():
+    """Returns count, mean and max duration for each recorded wait."""
+    return {
+        name: {
+            'count': len(times),
+            'mean': sum(times) / len(times),
+            'max': max(times),
+        }
+        for name, times in wait_times.items()
+        if times
+    }
+
+
+def format_wait_summary():
+    """Returns the wait summary as a printable table."""
+    lines = [f"{'Wait':<30} {'Count':>6} {'Mean s':>8} {'Max s':>8}"]
+    for name, stats in sorted(wait_summary().items()):
+        lines.append(f"{name:<30} {stats['count']:>6} {stats['mean']:>8.3f} {stats['max']:>8.3f}")
+    return "\n".join(lines)
@@ -0,0 +1,333 @@
+"""Long-running worker that runs job records from a JSONL queue in one warm process.
+
+Each line of the queue is a job record, a JSON object with an id, a task name and its arguments::
+
+    {"request_id": "job-1", "task": "lyrics", "args": {"song_name": "Hello"}}
+
+Tasks:
+
+* ``lyrics``: looks up ``song_name`` or every name in ``songs`` with one logged-in GetLyrics session.
+* ``orders``: runs order_robots over the CSV in ``file`` (default orders.csv) or the ``rows`` given.
+* ``form``: fills the rpachallenge form from the Excel ``file`` (default challenge.xlsx) into ``pdf``.
+
+Every task keeps its browser between jobs on its own thread, so interpreter startup, imports,
+browser launch and login are paid once. A reader thread prefetches up to ``--prefetch`` records,
+at most ``--max-in-flight`` jobs are queued or running at once, and SIGINT/SIGTERM stop reading
+and let the running jobs finish. Each job's status and latency are appended to the results file,
+and completed request ids are journaled so a restarted worker skips them. Every job's timing spans
+are tagged with its own run id, {worker run}-{line}, in the worker's span log, and their step
+totals are included in the job's result.
+
+Run with ``python -m worker [--queue FILE] [--follow]``.
+"""
+import argparse
+import json
+import os
+import queue
+import signal
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import timing
+from checkpoint import CHECKPOINT_FOLDER, Journal
+from timing import span
+
+QUEUE_PATH = os.environ.get("WORKER_QUEUE", os.path.join('devdata', 'jobs.jsonl'))
+RESULTS_PATH = os.path.join('output', 'worker_results.jsonl')
+JOURNAL_PATH = os.path.join(CHECKPOINT_FOLDER, 'worker.journal')
+
+
+def parse_job(line):
+    """Returns the request id, task name and arguments of a queue line.
+
+    Raises ValueError for invalid JSON and AttributeError for a record that is not an object.
+    """
+    record = json.loads(line)
+    task = record.get('task')
+    args = record.get('args') or {}
+    if not task:
+        raise ValueError("job record has no task")
+    if not isinstance(args, dict):
+        raise ValueError("job arguments must be an object")
+    return record.get('request_id'), task, args
+
+
+def read_jobs(path, follow=False, poll_interval=1.0, stop=None):
+    """Yields the line number and text of each non-empty line of a JSONL queue, waiting for new lines with ``follow``.
+
+    A line without its newline may still be being written, so it is only read once complete.
+    Lines are parsed by the dispatcher, so a malformed line fails only its own job.
+    """
+    stop = stop or threading.Event()
+    while not os.path.exists(path):
+        if not follow or stop.wait(poll_interval):
+            return
+    with open(path, 'r', encoding='utf-8') as file:
+        pending = ''
+        line_number = 0
+        while not stop.is_set():
+            line = file.readline()
+            if line.endswith('\n') or (line and not follow):
+                line, pending = pending + line, ''
+                line_number += 1
+                if line.strip():
+                    yield line_number, line
+            elif line:
+                pending += line
+            elif not follow or stop.wait(poll_interval):
+                return
+
+
+class LyricsHandler:
+    """Runs lyrics jobs with one GetLyrics session that stays logged in between jobs."""
+
+    name = 'lyrics'
+
+    def __init__(self):
+        self.lyrics = None
+        self.credentials = None
+
+    def credentials_for(self, args):
+        if args.get('username') and args.get('password'):
+            return args['username'], args['password']
+        from tasks import get_assets
+
+        user = get_assets().get_asset('lyrics_user')['value']
+        return user.get('username'), user.get('password')
+
+    def run(self, args):
+        from tasks import GetLyrics
+
+        credentials = self.credentials_for(args)
+        if self.lyrics is None or credentials != self.credentials:
+            self.close()
+            self.lyrics = GetLyrics(*credentials, None)
+            self.credentials = credentials
+        songs = args.get('songs') or [args['song_name']]
+        records = [self.lyrics.lookup_song(song_name) for song_name in songs]
+        status = 'ok' if all(record['status'] == 'ok' for record in records) else 'error'
+        return status, records
+
+    def close(self):
+        if self.lyrics is not None:
+            self.lyrics.close()
+            self.lyrics = None
+
+
+class OrdersHandler:
+    """Runs order jobs in one order_robots browser that is opened on the first job."""
+
+    name = 'orders'
+
+    def __init__(self, headless=True):
+        self.headless = headless
+        self.attached = None
+
+    def run(self, args):
+        import order_robots
+        from row_readers import iter_csv_rows
+
+        if self.attached is None:
+            self.attached = order_robots.open_order_browser(headless=self.headless)
+        rows = args.get('rows') or iter_csv_rows(args.get('file', 'orders.csv'))
+        completed = order_robots.process_order_rows(rows)
+        return 'ok', completed
+
+    def close(self):
+        if self.attached is not None:
+            import order_robots
+
+            order_robots.close_order_browser(self.attached)
+            order_robots.close_image_cache()
+            self.attached = None
+
+
+class FormHandler:
+    """Runs form jobs in one Playwright browser that is launched on the first job."""
+
+    name = 'form'
+
+    def __init__(self, headless=True):
+        self.headless = headless
+        self.playwright = None
+        self.browser = None
+
+    def run(self, args):
+        import input_form
+
+        if self.browser is None:
+            from playwright.sync_api import sync_playwright
+
+            self.playwright = sync_playwright().start()
+            self.browser = self.playwright.chromium.launch(headless=self.headless)
+        os.makedirs('images', exist_ok=True)
+        page = self.browser.new_page()
+        try:
+            page.goto(input_form.FORM_URL)
+            with input_form.open_pdf_writer(args.get('pdf', input_form.PDF_PATH)) as writer:
+                input_form.fill_form_with_excel_data(page, writer, args.get('file', 'challenge.xlsx'))
+        finally:
+            page.close()
+        return 'ok', writer.files
+
+    def close(self):
+        if self.browser is not None:
+            self.browser.close()
+            self.playwright.stop()
+            self.browser = self.playwright = None
+
+
+class Worker:
+    """Dispatches queue records to the task handlers and records each job's result and latency.
+
+    Every handler has a single thread, since its browser is used by one job at a time and
+    Playwright's sync API only works on the thread that started it.
+    """
+
+    def __init__(self, handlers, max_in_flight=4, prefetch=8, results_path=RESULTS_PATH, journal_path=JOURNAL_PATH):
+        self.handlers = {handler.name: handler for handler in handlers}
+        self.executors = {name: ThreadPoolExecutor(max_workers=1) for name in self.handlers}
+        self.slots = threading.BoundedSemaphore(max_in_flight)
+        self.prefetched = queue.Queue(maxsize=max(1, prefetch))
+        self.stop = threading.Event()
+        self.journal = Journal(journal_path)
+        folder = os.path.dirname(results_path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        self.results = open(results_path, 'a', encoding='utf-8')
+        self.results_lock = threading.Lock()
+        self.counts = {'ok': 0, 'error': 0, 'skipped': 0}
+
+    def prefetch(self, path, follow):
+        """Reads records into the prefetch queue until the queue file ends or the worker stops."""
+        try:
+            for line_number, line in read_jobs(path, follow, stop=self.stop):
+                while not self.stop.is_set():
+                    try:
+                        self.prefetched.put((line_number, line, time.perf_counter()), timeout=0.5)
+                        break
+                    except queue.Full:
+                        pass
+        finally:
+            try:
+                self.prefetched.put(None, timeout=0.5)
+            except queue.Full:
+                # The dispatcher has stopped and no longer reads the queue
+                pass
+
+    def run(self, path, follow=False):
+        """Runs every record of the queue file, then waits for the running jobs to finish."""
+        reader = threading.Thread(target=self.prefetch, args=(path, follow), daemon=True)
+        reader.start()
+        try:
+            while not self.stop.is_set():
+                try:
+                    item = self.prefetched.get(timeout=0.5)
+                except queue.Empty:
+                    continue
+                if item is None:
+                    break
+                line_number, line, read_at = item
+                while not self.slots.acquire(timeout=0.5):
+                    if self.stop.is_set():
+                        break
+                else:
+                    self.dispatch(line_number, line, read_at)
+        finally:
+            self.drain()
+
+    def dispatch(self, line_number, line, read_at):
+        """Submits a queue line to its handler's thread, releasing its in-flight slot when it is done.
+
+        An invalid line gets an error result and the worker moves on to the next one.
+        """
+        request_id = None
+        try:
+            request_id, task, args = parse_job(line)
+            handler = self.handlers[task]
+        except (AttributeError, KeyError, ValueError) as e:
+            self.slots.release()
+            self.write_result({'request_id': request_id, 'line': line_number, 'status': 'error',
+                               'error': f"invalid job: {e!r}", 'seconds': 0.0})
+            print(f"Skipping invalid job on line {line_number}: {e!r}")
+            return
+        if request_id and request_id in self.journal:
+            self.slots.release()
+            self.counts['skipped'] += 1
+            print(f"Skipping job {request_id}: already completed")
+            return
+        future = self.executors[task].submit(self.run_job, handler, request_id, task, args, read_at, line_number)
+        future.add_done_callback(lambda _: self.slots.release())
+
+    def run_job(self, handler, request_id, task, args, read_at, line_number):
+        started = time.perf_counter()
+        result = {'request_id': request_id, 'task': task, 'queued_seconds': round(started - read_at, 3)}
+        with timing.run(f"{timing.RUN_ID}-{line_number}") as run_id:
+            try:
+                with span("job", task=task, request_id=request_id):
+                    result['status'], result['result'] = handler.run(args)
+            except Exception as e:
+                result['status'], result['error'] = 'error', str(e)
+            result['seconds'] = round(time.perf_counter() - started, 3)
+            result['run'] = run_id
+            result['steps'] = {name: round(stats['total'], 3) for name, stats in timing.summary().items()}
+        if result['status'] == 'ok' and request_id:
+            self.journal.record(request_id)
+        self.write_result(result)
+        print(f"Job {request_id} ({task}): {result['status']} in {result['seconds']}s")
+
+    def write_result(self, result):
+        with self.results_lock:
+            self.counts[result['status'] if result['status'] == 'ok' else 'error'] += 1
+            self.results.write(json.dumps(result, ensure_ascii=False, default=str) + "\n")
+            self.results.flush()
+
+    def request_stop(self, *_):
+        """Stops taking new jobs; the jobs already queued on a handler still run."""
+        if not self.stop.is_set():
+            print("Stopping: finishing the running jobs, send the signal again to abort")
+            self.stop.set()
+        else:
+            raise KeyboardInterrupt
+
+    def drain(self):
+        """Waits for the submitted jobs, then closes every handler on its own thread.
+
+        A handler that fails to close is logged and does not keep the others open.
+        """
+        try:
+            for name, executor in self.executors.items():
+                try:
+                    executor.submit(self.handlers[name].close).result()
+                except Exception as e:
+                    print(f"Error closing the {name} handler: {e!r}")
+                finally:
+                    executor.shutdown(wait=True)
+        finally:
+            self.journal.close()
+            self.results.close()
+        print(f"Worker finished: {self.counts['ok']} ok, {self.counts['error']} failed, {self.counts['skipped']} skipped")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run job records from a JSONL queue in one warm process.")
+    parser.add_argument('--queue', default=QUEUE_PATH)
+    parser.add_argument('--follow', action='store_true', help="keep waiting for new records at the end of the queue")
+    parser.add_argument('--max-in-flight', type=int, default=int(os.environ.get("WORKER_MAX_IN_FLIGHT", "4")))
+    parser.add_argument('--prefetch', type=int, default=int(os.environ.get("WORKER_PREFETCH", "8")))
+    parser.add_argument('--results', default=RESULTS_PATH)
+    args = parser.parse_args()
+
+    headless = os.environ.get("WORKER_HEADLESS", "true").lower() not in ('0', 'false', 'no')
+    worker = Worker(
+        [LyricsHandler(), OrdersHandler(headless), FormHandler(headless)],
+        args.max_in_flight, args.prefetch, args.results,
+    )
+    signal.signal(signal.SIGINT, worker.request_stop)
+    signal.signal(signal.SIGTERM, worker.request_stop)
+    worker.run(args.queue, args.follow)
+
+
+if __name__ == '__main__':
+    main()